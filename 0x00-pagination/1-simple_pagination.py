@@ -5,8 +5,13 @@ Pagination and Dataset Handling
 This script defines a Server class to paginate a dataset of popular baby names.
 """
 
-import csv
-from typing import List
+from typing import Iterator, List, Sequence
+
+dataset_store = __import__('dataset_store')
+DatasetLoader = dataset_store.DatasetLoader
+iter_pages = dataset_store.iter_pages
+iter_rows = dataset_store.iter_rows
+stream_rows = dataset_store.stream_rows
 
 
 def index_range(page: int, page_size: int) -> tuple:
@@ -36,19 +41,28 @@ class Server:
     """
     DATA_FILE = "Popular_Baby_Names.csv"
 
-    def __init__(self):
-        self.__dataset = None
+    def __init__(self, mode: str = "list", reload_interval: float = None,
+                 workers: int = 1):
+        """
+        Initialize the Server.
 
-    def dataset(self) -> List[List]:
-        """Cached dataset
+        Parameters:
+        - mode (str): How the dataset is stored, see
+          dataset_store.open_dataset. Default is "list".
+        - reload_interval (float): How often DATA_FILE is checked for
+          changes, in seconds, see dataset_store.DatasetLoader. Default
+          is None, to load it once.
+        - workers (int): How many processes parse DATA_FILE, see
+          parallel_load. Default is 1.
         """
-        if self.__dataset is None:
-            with open(self.DATA_FILE) as f:
-                reader = csv.reader(f)
-                dataset = [row for row in reader]
-            self.__dataset = dataset[1:]
+        self.mode = mode
+        self.__loader = DatasetLoader(self.DATA_FILE, mode, reload_interval,
+                                      workers)
 
-        return self.__dataset
+    def dataset(self) -> Sequence[List]:
+        """Cached dataset
+        """
+        return self.__loader.dataset()
 
     def get_page(self, page: int = 1, page_size: int = 10) -> List[List]:
         """
@@ -76,3 +90,41 @@ class Server:
             return []
 
         return dataset[start_index:end_index]
+
+    def iter_rows(self, start: int = 0) -> Iterator[List]:
+        """
+        Stream the rows of the dataset, from a row index on.
+
+        In "list" mode, when the dataset is not loaded yet, rows are read
+        straight from the CSV file and never held all at once.
+
+        Parameters:
+        - start (int): The index of the first row. Default is 0.
+
+        Returns:
+        Iterator[List]: The rows, in file order.
+        """
+        assert isinstance(
+            start, int) and start >= 0, "Start must be a non-negative integer."
+
+        if not self.__loader.loaded and self.mode == "list":
+            return stream_rows(self.DATA_FILE, start)
+        return iter_rows(self.dataset(), start)
+
+    def iter_pages(self, page_size: int = 10) -> Iterator[List[List]]:
+        """
+        Stream the dataset page by page, as get_page would return them
+        for page 1, 2, and so on.
+
+        Parameters:
+        - page_size (int): The number of items per page. Default is 10.
+
+        Returns:
+        Iterator[List[List]]: The pages, in order.
+        """
+        assert (
+            isinstance(page_size, int)
+            and page_size > 0
+        ), "Page size must be a positive integer."
+
+        return iter_pages(self.iter_rows(), page_size)
@@ -5,9 +5,17 @@ Pagination and Dataset Handling
 This script defines a Server class to paginate a dataset of popular baby names.
 """
 
-import csv
 import math
-from typing import List
+import threading
+from collections import OrderedDict
+from typing import Callable, Iterator, List, Sequence
+
+QueryIndex = __import__('query_index').QueryIndex
+dataset_store = __import__('dataset_store')
+DatasetLoader = dataset_store.DatasetLoader
+iter_pages = dataset_store.iter_pages
+iter_rows = dataset_store.iter_rows
+stream_rows = dataset_store.stream_rows
 
 
 def index_range(page: int, page_size: int) -> tuple:
@@ -32,24 +40,92 @@ def index_range(page: int, page_size: int) -> tuple:
     return start_index, end_index
 
 
+def hyper_page(page: int, page_size: int, total_items: int,
+               page_data: List[List]) -> dict:
+    """
+    Return the hypermedia response of a page.
+
+    Parameters:
+    - page (int): The page number.
+    - page_size (int): The number of items per page.
+    - total_items (int): The number of items in all the pages.
+    - page_data (List[List]): The rows of the page.
+
+    Returns:
+    dict: A dictionary containing pagination information.
+    """
+    total_pages = math.ceil(total_items / page_size)
+    next_page = page + 1 if page < total_pages else None
+    prev_page = page - 1 if page > 1 else None
+
+    return {
+        "page_size": len(page_data),
+        "page": page,
+        "data": page_data,
+        "next_page": next_page,
+        "prev_page": prev_page,
+        "total_pages": total_pages,
+    }
+
+
 class Server:
     """Server class to paginate a database of popular baby names.
     """
     DATA_FILE = "Popular_Baby_Names.csv"
+    RESPONSE_CACHE_SIZE = 256
+    RESPONSE_CACHE_ROWS = 10000
 
-    def __init__(self):
-        self.__dataset = None
+    def __init__(self, mode: str = "list", reload_interval: float = None,
+                 workers: int = 1):
+        """
+        Initialize the Server.
 
-    def dataset(self) -> List[List]:
+        Parameters:
+        - mode (str): How the dataset is stored, see
+          dataset_store.open_dataset. Default is "list".
+        - reload_interval (float): How often DATA_FILE is checked for
+          changes, in seconds, see dataset_store.DatasetLoader. Default
+          is None, to load it once.
+        - workers (int): How many processes parse DATA_FILE, see
+          parallel_load. Default is 1.
+        """
+        self.mode = mode
+        self.__loader = DatasetLoader(self.DATA_FILE, mode, reload_interval,
+                                      workers)
+        self.__query_index = None
+        self.__query_index_lock = threading.Lock()
+        self.__responses = OrderedDict()
+        self.__responses_dataset = None
+        self.__responses_rows = 0
+        self.__responses_lock = threading.Lock()
+
+    def dataset(self) -> Sequence[List]:
         """Cached dataset
         """
-        if self.__dataset is None:
-            with open(self.DATA_FILE) as f:
-                reader = csv.reader(f)
-                dataset = [row for row in reader]
-            self.__dataset = dataset[1:]
+        return self.__loader.dataset()
+
+    def query_index(self) -> QueryIndex:
+        """Secondary indexes of the current dataset, built on first use
+        and again whenever the dataset is reloaded
 
-        return self.__dataset
+        One caller builds them at a time. While the indexes of a reloaded
+        dataset are built, the other callers keep using the previous
+        ones; on first use, they wait for them.
+        """
+        index = self.__query_index
+        if index is not None and index.dataset is self.dataset():
+            return index
+        lock = self.__query_index_lock
+        if not lock.acquire(blocking=index is None):
+            return index
+        try:
+            dataset = self.dataset()
+            index = self.__query_index
+            if index is None or index.dataset is not dataset:
+                index = self.__query_index = QueryIndex(dataset)
+            return index
+        finally:
+            lock.release()
 
     def get_page(self, page: int = 1, page_size: int = 10) -> List[List]:
         """
@@ -78,14 +154,104 @@ class Server:
 
         return dataset[start_index:end_index]
 
+    def iter_rows(self, start: int = 0) -> Iterator[List]:
+        """
+        Stream the rows of the dataset, from a row index on.
+
+        In "list" mode, when the dataset is not loaded yet, rows are read
+        straight from the CSV file and never held all at once.
+
+        Parameters:
+        - start (int): The index of the first row. Default is 0.
+
+        Returns:
+        Iterator[List]: The rows, in file order.
+        """
+        assert isinstance(
+            start, int) and start >= 0, "Start must be a non-negative integer."
+
+        if not self.__loader.loaded and self.mode == "list":
+            return stream_rows(self.DATA_FILE, start)
+        return iter_rows(self.dataset(), start)
+
+    def iter_pages(self, page_size: int = 10) -> Iterator[List[List]]:
+        """
+        Stream the dataset page by page, as get_page would return them
+        for page 1, 2, and so on.
+
+        Parameters:
+        - page_size (int): The number of items per page. Default is 10.
+
+        Returns:
+        Iterator[List[List]]: The pages, in order.
+        """
+        assert (
+            isinstance(page_size, int)
+            and page_size > 0
+        ), "Page size must be a positive integer."
+
+        return iter_pages(self.iter_rows(), page_size)
+
     def get_hyper(self, page: int = 1, page_size: int = 10) -> dict:
         """
         Return a dictionary containing pagination information
         for the requested page.
 
+        Responses are cached, see _cached_response.
+
+        Parameters:
+        - page (int): The page number. Default is 1.
+        - page_size (int): The number of items per page. Default is 10.
+
+        Returns:
+        dict: A dictionary containing pagination information.
+        """
+        assert isinstance(
+            page, int) and page > 0, "Page must be a positive integer."
+        assert (
+            isinstance(page_size, int)
+            and page_size > 0
+        ), "Page size must be a positive integer."
+
+        # One snapshot of the dataset, in case it is reloaded meanwhile
+        dataset = self.dataset()
+
+        def render() -> dict:
+            """
+            Build the response from the dataset snapshot.
+            """
+            start_index, end_index = index_range(page, page_size)
+            return hyper_page(page, page_size, len(dataset),
+                              dataset[start_index:end_index])
+
+        return self._cached_response(("hyper", page, page_size), dataset,
+                                     render)
+
+    def get_query(self, page: int = 1, page_size: int = 10,
+                  year: int = None, gender: str = None,
+                  ethnicity: str = None, name_prefix: str = None,
+                  sort: str = None, descending: bool = False) -> dict:
+        """
+        Return a dictionary containing pagination information for the
+        requested page of the rows matching a query.
+
+        Filters left to None match every row. The page is read from the
+        secondary indexes of query_index(), in time proportional to the
+        page size, and total_pages counts the matching rows exactly. A
+        name_prefix of two letters or more, sorted by anything but the
+        name, sorts its matching rows first, see QueryIndex. Responses
+        are cached, see _cached_response.
+
         Parameters:
         - page (int): The page number. Default is 1.
         - page_size (int): The number of items per page. Default is 10.
+        - year (int): Keep the rows of this year of birth.
+        - gender (str): Keep the rows of this gender.
+        - ethnicity (str): Keep the rows of this ethnicity.
+        - name_prefix (str): Keep the names starting with this prefix,
+          ignoring case.
+        - sort (str): None for file order, "count", "rank" or "name".
+        - descending (bool): Reverse the order. Default is False.
 
         Returns:
         dict: A dictionary containing pagination information.
@@ -97,18 +263,68 @@ class Server:
             and page_size > 0
         ), "Page size must be a positive integer."
 
-        current_page = page
-        total_pages = math.ceil(len(self.dataset()) / page_size)
-        next_page = current_page + 1 if current_page < total_pages else None
-        prev_page = current_page - 1 if current_page > 1 else None
-
-        page_data = self.get_page(page, page_size)
-
-        return {
-            "page_size": len(page_data),
-            "page": current_page,
-            "data": page_data,
-            "next_page": next_page,
-            "prev_page": prev_page,
-            "total_pages": total_pages,
-        }
+        index = self.query_index()
+        filters = {"year": year, "gender": gender, "ethnicity": ethnicity}
+        key = ("query", page, page_size, year, gender, ethnicity,
+               name_prefix, sort, descending)
+
+        def render() -> dict:
+            """
+            Build the response from the indexes.
+            """
+            selection = index.select(filters, name_prefix, sort, descending)
+            start_index, end_index = index_range(page, page_size)
+            return hyper_page(page, page_size, len(selection),
+                              [index.dataset[i] for i in
+                               selection.page(start_index, end_index)])
+
+        return self._cached_response(key, index.dataset, render)
+
+    def _cached_response(self, key: tuple, dataset: Sequence[List],
+                         render: Callable[[], dict]) -> dict:
+        """
+        Return the cached response of a request, rendering it on a miss.
+
+        The cache holds the RESPONSE_CACHE_SIZE responses used last, and
+        no more than RESPONSE_CACHE_ROWS rows in all, as the rows of a
+        response may be decoded copies; a response of more rows is not
+        cached. It is emptied whenever the dataset is reloaded. Cached
+        responses are shared between callers, which must not modify
+        them.
+
+        Parameters:
+        - key (tuple): The method and arguments of the request.
+        - dataset (Sequence[List]): The dataset the response is read from.
+        - render (Callable[[], dict]): Builds the response.
+
+        Returns:
+        dict: The response.
+        """
+        if not self.RESPONSE_CACHE_SIZE:
+            return render()
+        responses = self.__responses
+        with self.__responses_lock:
+            if self.__responses_dataset is not dataset:
+                responses.clear()
+                self.__responses_rows = 0
+                self.__responses_dataset = dataset
+            response = responses.get(key)
+            if response is not None:
+                responses.move_to_end(key)
+                return response
+        response = render()
+        rows = len(response["data"])
+        if rows > self.RESPONSE_CACHE_ROWS:
+            return response
+        with self.__responses_lock:
+            if self.__responses_dataset is dataset:
+                old = responses.pop(key, None)
+                if old is not None:
+                    self.__responses_rows -= len(old["data"])
+                responses[key] = response
+                self.__responses_rows += rows
+                while (len(responses) > self.RESPONSE_CACHE_SIZE or
+                       self.__responses_rows > self.RESPONSE_CACHE_ROWS):
+                    _, old = responses.popitem(last=False)
+                    self.__responses_rows -= len(old["data"])
+        return response
@@ -3,8 +3,14 @@
 Deletion-resilient hypermedia pagination
 """
 
-import csv
-from typing import List, Dict
+import threading
+from typing import List, Dict, MutableMapping, Sequence
+
+cursor_index = __import__('cursor_index')
+DatasetLoader = __import__('dataset_store').DatasetLoader
+IndexedRows = cursor_index.IndexedRows
+decode_cursor = cursor_index.decode_cursor
+encode_cursor = cursor_index.encode_cursor
 
 
 class Server:
@@ -12,37 +18,65 @@ class Server:
     """
     DATA_FILE = "Popular_Baby_Names.csv"
 
-    def __init__(self):
-        self.__dataset = None
+    def __init__(self, mode: str = "list", reload_interval: float = None,
+                 workers: int = 1):
+        """
+        Initialize the Server.
+
+        Parameters:
+        - mode (str): How the dataset is stored, see
+          dataset_store.open_dataset. Default is "list".
+        - reload_interval (float): How often DATA_FILE is checked for
+          changes, in seconds, see dataset_store.DatasetLoader. Default
+          is None, to load it once.
+        - workers (int): How many processes parse DATA_FILE, see
+          parallel_load. Default is 1.
+        """
+        self.mode = mode
+        self.__loader = DatasetLoader(self.DATA_FILE, mode, reload_interval,
+                                      workers)
         self.__indexed_dataset = None
+        self.__indexed_version = 0
+        self.__indexed_full_version = 0
+        self.__index_lock = threading.Lock()
 
-    def dataset(self) -> List[List]:
+    def dataset(self) -> Sequence[List]:
         """Cached dataset
         """
-        if self.__dataset is None:
-            with open(self.DATA_FILE) as f:
-                reader = csv.reader(f)
-                dataset = [row for row in reader]
-            self.__dataset = dataset[1:]
-
-        return self.__dataset
+        return self.__loader.dataset()
 
-    def indexed_dataset(self) -> Dict[int, List]:
+    def indexed_dataset(self) -> MutableMapping[int, List]:
         """Dataset indexed by sorting position, starting at 0
+
+        Deleting a key removes the row from every page served after, in
+        O(log n), without copying the dataset. Rows appended to DATA_FILE
+        are added, keeping the deletions; any other change to the file
+        starts a new index.
         """
-        if self.__indexed_dataset is None:
-            dataset = self.dataset()
-            truncated_dataset = dataset[:1000]
-            self.__indexed_dataset = {
-                i: dataset[i] for i in range(len(dataset))
-            }
-        return self.__indexed_dataset
+        dataset, version, full_version = self.__loader.snapshot()
+        with self.__index_lock:
+            # A snapshot older than the index, taken by a slower caller,
+            # is left alone
+            if (self.__indexed_dataset is None or
+                    full_version > self.__indexed_full_version):
+                self.__indexed_dataset = IndexedRows(dataset)
+                self.__indexed_full_version = full_version
+                self.__indexed_version = version
+            elif (full_version == self.__indexed_full_version and
+                  version > self.__indexed_version):
+                self.__indexed_dataset.extend(dataset)
+                self.__indexed_version = version
+            return self.__indexed_dataset
 
     def get_hyper_index(self, index: int = None, page_size: int = 10) -> Dict:
         """
         Return a dictionary with pagination information
         based on the provided index.
 
+        Rows deleted from indexed_dataset() are skipped, so a client
+        following next_index never misses a row, whatever was deleted
+        between two requests.
+
         Parameters:
         - index (int): The current start index of the return page.
           Default is None.
@@ -60,25 +94,64 @@ class Server:
             and page_size > 0
         ), "Page size must be a positive integer."
 
-        dataset = self.dataset()
-        total_items = len(dataset)
+        indexed = self.indexed_dataset()
 
         if index is None:
             index = 0
         else:
-            assert index < total_items, "Index out of range."
+            assert index < indexed.index.size, "Index out of range."
 
-        current_page = index // page_size
-        start_index = current_page * page_size
-        end_index = min(start_index + page_size, total_items)
+        ids = indexed.ids_from(index, page_size)
+        next_index = ids[-1] + 1 if ids else None
 
-        next_index = end_index
-
-        page_data = dataset[start_index:end_index]
+        page_data = [indexed[i] for i in ids]
 
         return {
-            "index": start_index,
+            "index": index,
             "next_index": next_index,
             "page_size": len(page_data),
             "data": page_data
         }
+
+    def get_cursor_page(self, cursor: str = None,
+                        page_size: int = 10) -> Dict:
+        """
+        Return a dictionary with a page of rows and the cursor of the
+        page after it.
+
+        Cursors are opaque strings. A page costs O(log n + page_size),
+        however many rows were deleted or inserted before it.
+
+        Parameters:
+        - cursor (str): The next_cursor of the previous page, or None for
+          the first page. Default is None.
+        - page_size (int): The number of rows per page. Default is 10.
+
+        Returns:
+        Dict: A dictionary containing pagination information. next_cursor
+        is None on the last page.
+
+        Raises:
+        ValueError: If the cursor was not returned by this method.
+        """
+        assert (
+            isinstance(page_size, int)
+            and page_size > 0
+        ), "Page size must be a positive integer."
+
+        start = 0 if cursor is None else decode_cursor(cursor)
+
+        indexed = self.indexed_dataset()
+        ids = indexed.ids_from(start, page_size + 1)
+        next_cursor = None
+        if len(ids) > page_size:
+            next_cursor = encode_cursor(ids.pop())
+
+        page_data = [indexed[i] for i in ids]
+
+        return {
+            "cursor": cursor,
+            "next_cursor": next_cursor,
+            "page_size": len(page_data),
+            "data": page_data
+        }
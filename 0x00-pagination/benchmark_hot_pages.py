@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+benchmark_hot_pages.py
+Measure get_hyper and get_query requests per second on hot pages, with
+and without the response cache of the Server.
+
+The hot pages are the first and the last page of get_hyper, requested
+in turn the way index and "jump to end" links are, and the first and
+third page of a filtered and sorted get_query.
+
+Usage: ./benchmark_hot_pages.py [csv] (a synthetic baby names dataset of
+19418 rows by default)
+"""
+
+import itertools
+import os
+import sys
+import tempfile
+import time
+
+Server = __import__('2-hypermedia_pagination').Server
+write_dataset = __import__('make_dataset').write_dataset
+
+MODES = ["list", "mmap", "columnar"]
+PAGE_SIZE = 50
+DURATION = 0.5
+
+
+def requests_per_second(call):
+    """
+    Call `call` repeatedly for DURATION seconds.
+
+    Returns:
+        float: The number of calls per second.
+    """
+    calls = 0
+    start = time.perf_counter()
+    deadline = start + DURATION
+    while time.perf_counter() < deadline:
+        for _ in range(100):
+            call()
+        calls += 100
+    return calls / (time.perf_counter() - start)
+
+
+def main():
+    """
+    Print the requests per second of every mode, cached and uncached.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        path = sys.argv[1] if len(sys.argv) > 1 else None
+        if path is None:
+            path = os.path.join(tmp, "Popular_Baby_Names.csv")
+            write_dataset(path, 19418)
+        print("{:>10} {:>10} {:>14} {:>14}".format(
+            "mode", "request", "uncached/s", "cached/s"))
+        for mode in MODES:
+            results = {}
+            for cache_size in (0, Server.RESPONSE_CACHE_SIZE):
+                server_class = type("BenchServer", (Server,), {
+                    "DATA_FILE": path, "RESPONSE_CACHE_SIZE": cache_size})
+                server = server_class(mode)
+                last = -(-len(server.dataset()) // PAGE_SIZE)
+                server.query_index()
+                hyper = itertools.cycle([1, last])
+                query = itertools.cycle([1, 3])
+                results["get_hyper", cache_size] = requests_per_second(
+                    lambda: server.get_hyper(next(hyper), PAGE_SIZE))
+                results["get_query", cache_size] = requests_per_second(
+                    lambda: server.get_query(next(query), PAGE_SIZE,
+                                             year=2014, sort="count",
+                                             descending=True))
+            for request in ("get_hyper", "get_query"):
+                print("{:>10} {:>10} {:>14.0f} {:>14.0f}".format(
+                    mode, request, results[request, 0],
+                    results[request, Server.RESPONSE_CACHE_SIZE]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+benchmark_load.py
+Measure how long opening the dataset takes for several worker counts.
+
+The synthetic dataset is written once to the temporary directory and
+reused by later runs. Workers 1 is the plain, single process loader.
+
+Usage: ./benchmark_load.py [rows] [mode] [workers,...]
+(10000000 rows, columnar mode and 1,2,4,8 workers by default)
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+open_dataset = __import__('dataset_store').open_dataset
+write_dataset = __import__('make_dataset').write_dataset
+
+
+def main():
+    """
+    Print the load time of every worker count.
+    """
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10000000
+    mode = sys.argv[2] if len(sys.argv) > 2 else "columnar"
+    counts = sys.argv[3] if len(sys.argv) > 3 else "1,2,4,8"
+    path = os.path.join(tempfile.gettempdir(),
+                        "baby_names_{}.csv".format(rows))
+    if not os.path.exists(path):
+        write_dataset(path + ".tmp", rows)
+        os.replace(path + ".tmp", path)
+    print("{} rows, {} MB, {} mode, {} CPUs".format(
+        rows, os.path.getsize(path) // 2 ** 20, mode, os.cpu_count()))
+    print("{:>8} {:>10} {:>8}".format("workers", "load s", "speedup"))
+    baseline = None
+    for workers in [int(count) for count in counts.split(",")]:
+        start = time.perf_counter()
+        dataset = open_dataset(path, mode, workers)
+        elapsed = time.perf_counter() - start
+        assert len(dataset) == rows
+        del dataset
+        baseline = baseline or elapsed
+        print("{:>8} {:>10.2f} {:>8.2f}".format(workers, elapsed,
+                                                baseline / elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+benchmark_memory.py
+Measure the memory the dataset of a Server takes in each storage mode.
+
+The memory is what tracemalloc sees allocated once open_dataset returns.
+For "mmap" that is the row offset index only, and for "shared" the
+description of the columns only: the mapped files are in the page cache,
+shared with every other process mapping them. "binary" is measured
+after compiling the CSV file with compile_dataset.py if it was not. The
+dataset published in shared memory is removed at the end.
+
+Usage: ./benchmark_memory.py [csv] (a synthetic baby names dataset of
+19418 rows by default)
+"""
+
+import gc
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+compile_dataset = __import__('compile_dataset').compile_dataset
+dataset_store = __import__('dataset_store')
+open_dataset = dataset_store.open_dataset
+unpublish_dataset = __import__('shared_dataset').unpublish_dataset
+write_dataset = __import__('make_dataset').write_dataset
+
+MODES = ["list", "mmap", "columnar", "shared", "binary"]
+
+
+def measure(path, mode):
+    """
+    Open a dataset in a mode.
+
+    Returns:
+        tuple: The number of rows, the bytes allocated and the seconds
+        it took.
+    """
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    dataset = open_dataset(path, mode)
+    elapsed = time.perf_counter() - start
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(dataset), allocated, elapsed
+
+
+def main():
+    """
+    Print the memory of the dataset in every mode.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        path = sys.argv[1] if len(sys.argv) > 1 else None
+        if path is None:
+            path = os.path.join(tmp, "Popular_Baby_Names.csv")
+            write_dataset(path, 19418)
+        if not os.path.exists(dataset_store.compiled_path(path)):
+            compile_dataset(path)
+        print("{:>10} {:>8} {:>12} {:>10} {:>8}".format(
+            "mode", "rows", "bytes", "bytes/row", "load s"))
+        try:
+            for mode in MODES:
+                rows, allocated, elapsed = measure(path, mode)
+                print("{:>10} {:>8} {:>12} {:>10.1f} {:>8.3f}".format(
+                    mode, rows, allocated, allocated / max(rows, 1),
+                    elapsed))
+        finally:
+            unpublish_dataset(path)
+
+
+if __name__ == "__main__":
+    main()
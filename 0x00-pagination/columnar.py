@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Columnar Dataset
+
+This module provides the ColumnarDataset class, which stores the rows of
+a CSV file as one typed array per column instead of a list of lists.
+"""
+
+from array import array
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+INT_TYPECODES = "bhiq"
+CODE_TYPECODES = "BHI"
+
+
+def smallest_typecode(typecodes: str, low: int, high: int) -> str:
+    """
+    Return the first typecode whose arrays can hold every int in
+    [low, high].
+    """
+    for typecode in typecodes:
+        bits = array(typecode).itemsize * 8
+        if typecode.islower():
+            lowest, highest = -2 ** (bits - 1), 2 ** (bits - 1) - 1
+        else:
+            lowest, highest = 0, 2 ** bits - 1
+        if lowest <= low and high <= highest:
+            return typecode
+    raise OverflowError("{}..{} does not fit {}".format(low, high, typecodes))
+
+
+def encode_rows(rows: Iterable[List],
+                width: int) -> List[Tuple[array, List[str]]]:
+    """
+    Dictionary encode the columns of rows, one row at a time. Short rows
+    are padded with empty strings to `width` cells.
+
+    Returns:
+    List[Tuple[array, List[str]]]: For each column, the code of every
+    row and the distinct strings the codes point to.
+    """
+    dictionaries = [{} for _ in range(width)]
+    codes = [array("I") for _ in range(width)]
+    for row in rows:
+        if len(row) < width:
+            row = row + [""] * (width - len(row))
+        for dictionary, column, cell in zip(dictionaries, codes, row):
+            column.append(dictionary.setdefault(cell, len(dictionary)))
+    return [(column, list(dictionary))
+            for column, dictionary in zip(codes, dictionaries)]
+
+
+class Column:
+    """One column of a ColumnarDataset.
+
+    A numeric column keeps its ints in a typed array. Any other column is
+    dictionary encoded: every distinct string is stored once in `values`,
+    and `data` holds the position of the string of each row in `values`.
+    """
+
+    def __init__(self, data: array, values: List[str] = None):
+        """
+        Initialize the Column.
+
+        Parameters:
+        - data (array): The ints, or the codes, of the rows. Any buffer
+          of ints indexed like an array, such as a memoryview, works.
+        - values (List[str]): The distinct strings of a dictionary
+          encoded column, None for a numeric column.
+        """
+        self.data = data
+        self.values = values
+
+    def __len__(self) -> int:
+        """Number of rows
+        """
+        return len(self.data)
+
+    def cell(self, index: int) -> str:
+        """
+        Return the text of a row, as it was in the CSV file.
+        """
+        if self.values is None:
+            return str(self.data[index])
+        return self.values[self.data[index]]
+
+    def cells(self, start: int, stop: int) -> List[str]:
+        """
+        Return the text of the rows start to stop - 1.
+        """
+        data = self.data[start:stop]
+        if self.values is None:
+            return [str(value) for value in data]
+        values = self.values
+        return [values[code] for code in data]
+
+    def view(self, start: int, stop: int) -> memoryview:
+        """
+        Return the ints, or codes, of the rows start to stop - 1 without
+        copying them.
+        """
+        return memoryview(self.data)[start:stop]
+
+    @classmethod
+    def encode(cls, codes: array, values: List[str]) -> "Column":
+        """
+        Build the smallest Column from dictionary codes.
+
+        The column is numeric only if every distinct value is an int
+        written the way str() writes it, so that cell() gives back the
+        exact text.
+
+        Parameters:
+        - codes (array): The position in `values` of the text of each row.
+        - values (List[str]): The distinct strings of the column.
+        """
+        try:
+            ints = [int(value) for value in values]
+            numeric = all(str(i) == value for i, value in zip(ints, values))
+        except ValueError:
+            numeric = False
+        if numeric:
+            low, high = (min(ints), max(ints)) if ints else (0, 0)
+            typecode = smallest_typecode(INT_TYPECODES, low, high)
+            return cls(array(typecode, (ints[code] for code in codes)))
+        typecode = smallest_typecode(CODE_TYPECODES, 0, len(values))
+        return cls(array(typecode, codes), values)
+
+
+class ColumnarDataset:
+    """A sequence of CSV rows stored column by column.
+
+    On the baby names dataset, a row of the list of lists costs a list
+    and six str objects, about 400 bytes. Here it costs the width of its
+    six array cells, 2 bytes for the year, 1 for the gender and for the
+    ethnicity code, 2 for the name code and up to 4 for the count and 2
+    for the rank, plus the distinct names stored once: about 18 bytes a
+    row, 20 times less, for a load about 3 times slower.
+    See benchmark_memory.py.
+
+    Rows come back as lists of strings, as in the CSV file, so get_page
+    returns the same pages in every mode. Use view() to read a range of
+    rows as typed columns without copying anything.
+    """
+
+    def __init__(self, header: List[str], columns: List[Column],
+                 owner: object = None):
+        """
+        Initialize the ColumnarDataset.
+
+        Parameters:
+        - header (List[str]): The column names.
+        - columns (List[Column]): The columns, all of the same length.
+        - owner (object): What keeps the memory of the columns alive when
+          they are views of a buffer, such as a shared memory segment.
+        """
+        self.header = header
+        self.columns = columns
+        self.owner = owner
+
+    def __len__(self) -> int:
+        """Number of rows
+        """
+        return len(self.columns[0]) if self.columns else 0
+
+    def __getitem__(self, index):
+        """
+        Return one row, or a list of rows for a slice.
+
+        Parameters:
+        - index (int or slice): The position of the rows.
+
+        Returns:
+        List: A row as a list of strings, or a list of rows.
+        """
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            if start >= stop:
+                return []
+            cells = [column.cells(start, stop) for column in self.columns]
+            return [list(row) for row in zip(*cells)]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("row index out of range")
+        return [column.cell(index) for column in self.columns]
+
+    def __iter__(self) -> Iterator[List]:
+        """Iterate over the rows
+        """
+        return self.iter_rows()
+
+    def iter_rows(self, start: int = 0, chunk: int = 1024) -> Iterator[List]:
+        """
+        Iterate over the rows from a row index on, decoding `chunk` rows
+        at a time.
+        """
+        for i in range(start, len(self), chunk):
+            yield from self[i:i + chunk]
+
+    def view(self, start: int, stop: int) -> Dict[str, memoryview]:
+        """
+        Return the rows start to stop - 1 as typed columns, zero-copy.
+
+        Parameters:
+        - start (int): The index of the first row.
+        - stop (int): The index after the last row.
+
+        Returns:
+        Dict[str, memoryview]: The ints, or the dictionary codes, of each
+        column by name. Decode codes with columns[i].values.
+        """
+        return {name: column.view(start, stop)
+                for name, column in zip(self.header, self.columns)}
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[List]) -> "ColumnarDataset":
+        """
+        Build a ColumnarDataset from CSV rows, the header row first.
+
+        Rows are consumed one at a time, so a streaming reader never has
+        to hold the dataset as a list of lists. Short rows are padded with
+        empty strings to the width of the header.
+        """
+        rows = iter(rows)
+        header = next(rows, [])
+        return cls(header, [Column.encode(codes, values)
+                            for codes, values in encode_rows(rows,
+                                                             len(header))])
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Cursor Index
+
+This module provides the ordered row index behind deletion-resilient
+pagination: the CursorIndex of the row ids still present, the
+IndexedRows mapping built on it, and the opaque cursors handed to
+clients.
+"""
+
+import base64
+import binascii
+import struct
+from array import array
+from collections.abc import MutableMapping
+from typing import Iterator, List, Sequence
+
+CURSOR = struct.Struct("<BQ")
+CURSOR_VERSION = 1
+
+
+class CursorIndex:
+    """An ordered set of row ids, from 0 to size - 1.
+
+    A Fenwick tree counts the ids present in every range, which gives the
+    rank of an id, and the id of a rank, in O(log n). The present ids are
+    also chained in order through the next and prev arrays, so once the
+    first id of a page is found the rest of the page is read in O(1) per
+    row. Adding or removing an id is O(log n), and fetching a page of k
+    ids is O(log n + k), whatever was deleted before it.
+    """
+
+    def __init__(self, size: int = 0):
+        """
+        Initialize a CursorIndex holding every id from 0 to size - 1.
+
+        Parameters:
+        - size (int): The number of ids. Default is 0.
+        """
+        self.size = size
+        self.count = size
+        self.present = bytearray(b"\x01") * size
+        # Every id is present, so node i of the tree counts lowbit(i) ids
+        self.tree = array("i", (i & -i for i in range(size + 1)))
+        self.next = array("i", range(1, size + 1))
+        self.prev = array("i", range(-1, size - 1))
+        if size:
+            self.next[-1] = -1
+        self.head = 0 if size else -1
+        self.tail = size - 1
+
+    def __len__(self) -> int:
+        """Number of ids present
+        """
+        return self.count
+
+    def __contains__(self, i) -> bool:
+        """
+        Tell whether an id is present.
+        """
+        return (isinstance(i, int) and 0 <= i < self.size
+                and self.present[i] == 1)
+
+    def rank(self, i: int) -> int:
+        """
+        Return the number of ids present below i.
+        """
+        i = min(i, self.size)
+        total = 0
+        tree = self.tree
+        while i > 0:
+            total += tree[i]
+            i -= i & -i
+        return total
+
+    def select(self, rank: int) -> int:
+        """
+        Return the id present at a rank, counting from 0, or -1 if fewer
+        ids are present.
+        """
+        if not 0 <= rank < self.count:
+            return -1
+        position = 0
+        remaining = rank + 1
+        tree = self.tree
+        step = 1 << self.size.bit_length()
+        while step:
+            node = position + step
+            if node <= self.size and tree[node] < remaining:
+                position = node
+                remaining -= tree[node]
+            step >>= 1
+        return position
+
+    def successor(self, i: int) -> int:
+        """
+        Return the first id present at or after i, or -1 if there is none.
+        """
+        if i in self:
+            return i
+        return self.select(self.rank(max(i, 0)))
+
+    def iter_from(self, i: int = 0, limit: int = None) -> Iterator[int]:
+        """
+        Iterate over the ids present from i on, in order.
+
+        Parameters:
+        - i (int): The first id that may be returned. Default is 0.
+        - limit (int): The most ids returned. Default is no limit.
+
+        Yields:
+        int: The ids.
+        """
+        i = self.successor(i)
+        while i >= 0 and (limit is None or limit > 0):
+            yield i
+            i = self.next[i]
+            if limit is not None:
+                limit -= 1
+
+    def add(self, i: int) -> None:
+        """
+        Add an id, growing the range of ids if it is size or more.
+        """
+        if i < 0:
+            raise IndexError("ids are non-negative")
+        if i >= self.size:
+            self._grow(i + 1)
+        if self.present[i]:
+            return
+        rank = self.rank(i)
+        before = self.select(rank - 1) if rank else -1
+        after = self.next[before] if before >= 0 else self.head
+        self.prev[i], self.next[i] = before, after
+        if before >= 0:
+            self.next[before] = i
+        else:
+            self.head = i
+        if after >= 0:
+            self.prev[after] = i
+        else:
+            self.tail = i
+        self.present[i] = 1
+        self._update(i, 1)
+
+    def remove(self, i: int) -> None:
+        """
+        Remove an id present.
+
+        The next link of the id is kept, so an iteration that just
+        returned it goes on with the ids after it.
+        """
+        if i not in self:
+            raise KeyError(i)
+        before, after = self.prev[i], self.next[i]
+        if before >= 0:
+            self.next[before] = after
+        else:
+            self.head = after
+        if after >= 0:
+            self.prev[after] = before
+        else:
+            self.tail = before
+        self.present[i] = 0
+        self._update(i, -1)
+
+    def _update(self, i: int, delta: int) -> None:
+        """
+        Add delta to the count of id i.
+        """
+        self.count += delta
+        node = i + 1
+        tree = self.tree
+        while node <= self.size:
+            tree[node] += delta
+            node += node & -node
+
+    def _grow(self, size: int) -> None:
+        """
+        Extend the range of ids to size, the new ids being absent.
+        """
+        for node in range(self.size + 1, size + 1):
+            # The new node counts the ids in (node - lowbit(node), node],
+            # the present ones being all below self.size
+            self.tree.append(self.rank(node - 1) -
+                             self.rank(node - (node & -node)))
+        grown = size - self.size
+        self.present.extend(bytes(grown))
+        self.next.extend(array("i", [-1]) * grown)
+        self.prev.extend(array("i", [-1]) * grown)
+        self.size = size
+
+
+class IndexedRows(MutableMapping):
+    """The rows of a dataset by id, their position in the file.
+
+    Deleting a row only removes its id from a CursorIndex, and rows added
+    or replaced are kept apart in a dict, so the dataset itself is never
+    copied or changed.
+    """
+
+    def __init__(self, dataset: Sequence[List]):
+        """
+        Index every row of a dataset.
+
+        Parameters:
+        - dataset (Sequence[List]): The rows.
+        """
+        self.dataset = dataset
+        self.index = CursorIndex(len(dataset))
+        self.rows = {}
+
+    def __getitem__(self, i: int) -> List:
+        """
+        Return the row of an id.
+        """
+        if i not in self.index:
+            raise KeyError(i)
+        row = self.rows.get(i)
+        return self.dataset[i] if row is None else row
+
+    def __setitem__(self, i: int, row: List) -> None:
+        """
+        Add or replace the row of an id.
+        """
+        if not isinstance(i, int) or i < 0:
+            raise KeyError(i)
+        self.rows[i] = row
+        self.index.add(i)
+
+    def __delitem__(self, i: int) -> None:
+        """
+        Delete the row of an id.
+        """
+        self.index.remove(i)
+        self.rows.pop(i, None)
+
+    def __iter__(self) -> Iterator[int]:
+        """Iterate over the ids, in order
+        """
+        return self.index.iter_from(0)
+
+    def __len__(self) -> int:
+        """Number of rows
+        """
+        return len(self.index)
+
+    def __contains__(self, i) -> bool:
+        """
+        Tell whether an id has a row.
+        """
+        return i in self.index
+
+    def extend(self, dataset: Sequence[List]) -> None:
+        """
+        Switch to a longer version of the dataset, adding the ids of its
+        new rows. An id past the end of the old dataset that already has
+        a row keeps it.
+
+        Parameters:
+        - dataset (Sequence[List]): The dataset with rows appended.
+        """
+        for i in range(len(self.dataset), len(dataset)):
+            self.index.add(i)
+        self.dataset = dataset
+
+    def ids_from(self, i: int, limit: int) -> List[int]:
+        """
+        Return up to `limit` ids, in order, from the first id present at
+        or after i.
+        """
+        return list(self.index.iter_from(i, limit))
+
+
+def encode_cursor(i: int) -> str:
+    """
+    Return the opaque cursor of a page starting at row id i.
+    """
+    raw = CURSOR.pack(CURSOR_VERSION, i)
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str) -> int:
+    """
+    Return the row id a cursor points to.
+
+    Raises:
+    ValueError: If the cursor was not made by encode_cursor.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        version, i = CURSOR.unpack(raw)
+    except (binascii.Error, struct.error, TypeError) as error:
+        raise ValueError("Invalid cursor") from error
+    if version != CURSOR_VERSION:
+        raise ValueError("Invalid cursor")
+    return i
@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Dataset Loading
+
+This module opens the dataset of a pagination Server in one of several
+storage modes. Every mode returns a sequence of rows, supporting len(),
+indexing and slicing, so get_page works the same on all of them.
+"""
+
+import csv
+import io
+import itertools
+import os
+import threading
+import time
+import warnings
+import zlib
+from typing import Iterator, List, Sequence, Tuple
+
+ColumnarDataset = __import__('columnar').ColumnarDataset
+MappedCSV = __import__('mapped_csv').MappedCSV
+open_shared = __import__('shared_dataset').open_shared
+packed_dataset = __import__('packed_dataset')
+parallel_load = __import__('parallel_load')
+
+MODES = ("list", "mmap", "columnar", "shared", "binary")
+TAIL_BYTES = 4096
+
+
+def compiled_path(path: str) -> str:
+    """
+    Return where compile_dataset.py writes the binary dataset of a CSV
+    file: the same name, with a .pds extension.
+    """
+    return os.path.splitext(path)[0] + ".pds"
+
+
+def source_stamp(path: str) -> List[int]:
+    """
+    Return the [size, mtime_ns] a binary dataset records of the CSV file
+    it is compiled from, or None if there is no such file.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def open_compiled(path: str) -> ColumnarDataset:
+    """
+    Map the binary dataset compiled from a CSV file, warning with a
+    RuntimeWarning when the CSV file changed since it was compiled.
+
+    Parameters:
+    - path (str): The CSV file. It does not need to exist.
+
+    Returns:
+    ColumnarDataset: The dataset, reading its rows from the mapping.
+    """
+    target = compiled_path(path)
+    dataset = packed_dataset.open_packed(target)
+    stamp = source_stamp(path)
+    if stamp is not None and stamp != packed_dataset.packed_source(target):
+        warnings.warn("{} is older than {}: run compile_dataset.py "
+                      "again".format(target, path), RuntimeWarning)
+    return dataset
+
+
+def read_rows(path: str) -> List[List]:
+    """
+    Parse a whole CSV file into a list of rows, header excluded.
+
+    Parameters:
+    - path (str): The CSV file.
+
+    Returns:
+    List[List]: The rows, as lists of strings.
+    """
+    with open(path) as f:
+        reader = csv.reader(f)
+        dataset = [row for row in reader]
+    return dataset[1:]
+
+
+def open_dataset(path: str, mode: str = "list",
+                 workers: int = 1) -> Sequence[List]:
+    """
+    Open a CSV dataset in the given storage mode.
+
+    Parameters:
+    - path (str): The CSV file.
+    - mode (str): "list" parses every row up front into a list of lists.
+      "mmap" memory-maps the file and parses rows on access, see
+      MappedCSV. "columnar" parses every row up front into typed
+      columns, see ColumnarDataset. "shared" pages over typed columns
+      kept in shared memory by all the processes, see
+      shared_dataset.open_shared. "binary" maps the file compiled from
+      the CSV file by compile_dataset.py, see compiled_path, without
+      parsing anything, see open_compiled.
+    - workers (int): How many processes parse the file in "list" and
+      "columnar" modes, see parallel_load. Default is 1, parsing it in
+      this process.
+
+    Returns:
+    Sequence[List]: The rows of the dataset.
+    """
+    if mode == "list" and workers > 1:
+        return parallel_load.read_rows_parallel(path, workers)
+    if mode == "list":
+        return read_rows(path)
+    if mode == "mmap":
+        return MappedCSV(path)
+    if mode == "columnar" and workers > 1:
+        return parallel_load.read_columnar_parallel(path, workers)
+    if mode == "columnar":
+        with open(path) as f:
+            return ColumnarDataset.from_rows(csv.reader(f))
+    if mode == "shared":
+        return open_shared(path)
+    if mode == "binary":
+        return open_compiled(path)
+    raise ValueError("Unknown dataset mode: {!r}".format(mode))
+
+
+def stream_rows(path: str, start: int = 0) -> Iterator[List]:
+    """
+    Read the rows of a CSV file one at a time, without keeping them.
+
+    Parameters:
+    - path (str): The CSV file.
+    - start (int): The index of the first row, header excluded.
+
+    Yields:
+    List: The rows, as lists of strings.
+    """
+    with open(path) as f:
+        yield from itertools.islice(csv.reader(f), start + 1, None)
+
+
+def iter_rows(dataset: Sequence[List], start: int = 0) -> Iterator[List]:
+    """
+    Iterate over an opened dataset from a row index on.
+
+    Parameters:
+    - dataset (Sequence[List]): A dataset returned by open_dataset.
+    - start (int): The index of the first row.
+
+    Returns:
+    Iterator[List]: The rows.
+    """
+    if hasattr(dataset, "iter_rows"):
+        return dataset.iter_rows(start)
+    return (dataset[i] for i in range(start, len(dataset)))
+
+
+def iter_pages(rows: Iterator[List], page_size: int) -> Iterator[List[List]]:
+    """
+    Group rows into pages.
+
+    Parameters:
+    - rows (Iterator[List]): The rows.
+    - page_size (int): The number of rows per page. Only the last page
+      may be shorter.
+
+    Yields:
+    List[List]: The pages.
+    """
+    rows = iter(rows)
+    page = list(itertools.islice(rows, page_size))
+    while page:
+        yield page
+        page = list(itertools.islice(rows, page_size))
+
+
+def parse_from(path: str, offset: int) -> Tuple[List[List], int]:
+    """
+    Parse the complete lines of a CSV file from a byte offset on.
+
+    Parameters:
+    - path (str): The CSV file.
+    - offset (int): Where to start, at the beginning of a line.
+
+    Returns:
+    Tuple[List[List], int]: The rows, and the offset after the last line
+    parsed. A last line without its newline, maybe still being written,
+    is only parsed when it is the whole file, offset being 0.
+    """
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = f.read()
+    if offset:
+        data = data[:data.rfind(b"\n") + 1]
+    text = data.decode("utf-8")
+    return list(csv.reader(io.StringIO(text, newline=""))), offset + len(data)
+
+
+def tail_checksum(path: str, offset: int) -> int:
+    """
+    Return the CRC-32 of the TAIL_BYTES bytes before an offset, or -1 if
+    they do not end with a newline: rows can only be appended after a
+    complete line.
+    """
+    start = max(0, offset - TAIL_BYTES)
+    with open(path, "rb") as f:
+        f.seek(start)
+        tail = f.read(offset - start)
+    return zlib.crc32(tail) if tail.endswith(b"\n") else -1
+
+
+class DatasetLoader:
+    """Opens the dataset of a Server and keeps it up to date with its file.
+
+    With a reload interval, the size and modification time of the file
+    are checked at most once per interval. A file that only grew, its
+    last TAIL_BYTES bytes up to the previous end unchanged, gets its new
+    complete lines parsed and appended in "list" mode. In the other
+    modes it is reopened in full, but still reported as appended. Any
+    other change reopens the whole dataset, once the file ends with a
+    newline, so a line still being written is never served. Either way
+    the new dataset replaces the old one in a single assignment: a
+    caller holding the old one keeps a consistent view of it.
+
+    snapshot returns the dataset together with its version, bumped on
+    every change, and the version it was last opened in full at: a
+    dataset whose full version did not change since an earlier snapshot
+    holds the same rows, plus rows appended after them.
+    """
+
+    def __init__(self, path: str, mode: str = "list",
+                 reload_interval: float = None, workers: int = 1):
+        """
+        Initialize the DatasetLoader.
+
+        Parameters:
+        - path (str): The CSV file.
+        - mode (str): The storage mode, see open_dataset.
+        - reload_interval (float): How often the file is checked for
+          changes, in seconds; 0 checks on every call. Default is None,
+          to never reload.
+        - workers (int): How many processes parse the file when it is
+          opened in full, see open_dataset. Default is 1.
+        """
+        self.path = path
+        self.mode = mode
+        self.reload_interval = reload_interval
+        self.workers = workers
+        self.state = None
+        self.stamp = None
+        self.offset = 0
+        self.tail = 0
+        self.checked = 0.0
+        self.lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        """Whether the dataset was opened
+        """
+        return self.state is not None
+
+    def dataset(self) -> Sequence[List]:
+        """
+        Return the current dataset, opening or reloading it if needed.
+
+        Returns:
+        Sequence[List]: The rows of the dataset.
+        """
+        return self.snapshot()[0]
+
+    def snapshot(self) -> Tuple[Sequence[List], int, int]:
+        """
+        Return the current dataset, opening or reloading it if needed,
+        with its version and the version it was last opened in full at.
+
+        Returns:
+        Tuple[Sequence[List], int, int]: The dataset, its version and
+        its full version, read together.
+        """
+        if self.state is None:
+            with self.lock:
+                if self.state is None:
+                    self._reload()
+        elif (self.reload_interval is not None and
+              time.monotonic() - self.checked >= self.reload_interval):
+            with self.lock:
+                self._reload()
+        return self.state
+
+    def _reload(self) -> None:
+        """
+        Open the dataset again, or append the new rows, if the file
+        changed, then replace state with the new snapshot.
+        """
+        self.checked = time.monotonic()
+        # A binary dataset is reloaded when it is compiled again
+        if self.mode == "binary":
+            # or when its CSV file changes, to warn that it is stale
+            stat = os.stat(compiled_path(self.path))
+            stamp = (stat.st_size, stat.st_mtime_ns,
+                     source_stamp(self.path))
+        else:
+            stat = os.stat(self.path)
+            stamp = (stat.st_size, stat.st_mtime_ns)
+        if stamp == self.stamp:
+            return
+        current, version, full_version = self.state or (None, 0, 0)
+        appended = (current is not None and self.mode != "binary"
+                    and stat.st_size > self.offset and self.tail >= 0 and
+                    tail_checksum(self.path, self.offset) == self.tail)
+        grown = appended and self.mode == "list"
+        if (not grown and current is not None and
+                self.mode != "binary" and stat.st_size and
+                tail_checksum(self.path, stat.st_size) < 0):
+            # Wait for the line being written, without taking the stamp
+            return
+        if grown:
+            rows, offset = parse_from(self.path, self.offset)
+            dataset = current + rows
+        elif self.mode == "list" and self.workers > 1:
+            # Parse up to the size seen, so appended lines are not missed
+            offset = stat.st_size
+            dataset = parallel_load.read_rows_parallel(
+                self.path, self.workers, offset)
+        elif self.mode == "list":
+            rows, offset = parse_from(self.path, 0)
+            dataset = rows[1:]
+        else:
+            offset = stat.st_size
+            dataset = open_dataset(self.path, self.mode, self.workers)
+            if (current is not None and self.mode != "binary" and
+                    os.stat(self.path).st_size != offset):
+                # The file changed while it was opened, maybe in the
+                # middle of a line: try again on the next check
+                return
+        version += 1
+        if not appended:
+            full_version = version
+        self.stamp = stamp
+        self.offset = offset
+        if self.mode == "binary":
+            self.tail = -1
+        else:
+            self.tail = tail_checksum(self.path, offset)
+        self.state = (dataset, version, full_version)
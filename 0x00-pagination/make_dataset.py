@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Synthetic Dataset
+
+This script writes a CSV shaped like Popular_Baby_Names.csv, with any
+number of rows, for the benchmarks.
+
+Usage: ./make_dataset.py [rows] [path]
+(19418 rows and Synthetic_Baby_Names.csv by default: the Servers read
+Popular_Baby_Names.csv, which is only overwritten when given as path)
+"""
+
+import csv
+import random
+import sys
+
+HEADER = ["Year of Birth", "Gender", "Ethnicity", "Child's First Name",
+          "Count", "Rank"]
+ETHNICITIES = ["ASIAN AND PACIFIC ISLANDER", "BLACK NON HISPANIC",
+               "HISPANIC", "WHITE NON HISPANIC"]
+SYLLABLES = ["a", "be", "cha", "da", "el", "fi", "ga", "ha", "is", "jo",
+             "ka", "li", "ma", "na", "ol", "pe", "ri", "sa", "ta", "vi"]
+
+
+def make_names(count: int, rng: random.Random) -> list:
+    """
+    Return `count` distinct first names made of two or three syllables.
+    """
+    names = set()
+    while len(names) < count:
+        parts = rng.choices(SYLLABLES, k=rng.randint(2, 3))
+        names.add("".join(parts).upper())
+    return sorted(names)
+
+
+def write_dataset(path: str, rows: int, seed: int = 0) -> None:
+    """
+    Write a synthetic baby names dataset.
+
+    Parameters:
+    - path (str): The CSV file to write.
+    - rows (int): The number of rows, header excluded.
+    - seed (int): The seed of the random generator. Default is 0.
+    """
+    rng = random.Random(seed)
+    names = make_names(2000, rng)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        for _ in range(rows):
+            count = int(rng.paretovariate(1.2) * 10)
+            writer.writerow([rng.randint(2011, 2016), rng.choice("MF"),
+                             rng.choice(ETHNICITIES), rng.choice(names),
+                             count, rng.randint(1, 100)])
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 19418
+    path = sys.argv[2] if len(sys.argv) > 2 else "Synthetic_Baby_Names.csv"
+    write_dataset(path, rows)
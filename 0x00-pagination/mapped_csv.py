@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Memory-mapped CSV
+
+This module provides the MappedCSV class, a read-only view of the rows of
+a CSV file that parses only the rows it is asked for.
+"""
+
+import csv
+import io
+import mmap
+import os
+from array import array
+from typing import List
+
+INDEX_MAGIC = b"RIX1"
+
+
+class MappedCSV:
+    """A sequence of the rows of a CSV file, header excluded.
+
+    The file is memory-mapped and a row offset index, the byte offset at
+    which each row starts, is built by one scan of the file. The index is
+    saved next to the file, as <path>.idx, and reused as long as the size
+    and modification time of the file are unchanged. Indexing or slicing
+    only decodes the bytes of the requested rows, so memory use does not
+    depend on the size of the file.
+    """
+
+    def __init__(self, path: str, index_path: str = None):
+        """
+        Map a CSV file and load, or build, its row offset index.
+
+        Parameters:
+        - path (str): The CSV file.
+        - index_path (str): Where the index is saved. Default is
+          <path>.idx.
+        """
+        self.path = path
+        self.index_path = index_path or path + ".idx"
+        with open(path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            self.stamp = (stat.st_size, stat.st_mtime_ns)
+            if stat.st_size:
+                self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            else:
+                self.data = b""
+        self.offsets = self._load_index()
+        if self.offsets is None:
+            self.offsets = self._build_index()
+            self._save_index()
+
+    def __len__(self) -> int:
+        """Number of rows
+        """
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        """
+        Return one row, or a list of rows for a slice.
+
+        Parameters:
+        - index (int or slice): The position of the rows.
+
+        Returns:
+        List: A row as a list of strings, or a list of rows.
+        """
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            if start >= stop:
+                return []
+            return self._parse(self.offsets[start], self.offsets[stop])
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("row index out of range")
+        return self._parse(self.offsets[index], self.offsets[index + 1])[0]
+
+    def __iter__(self):
+        """Iterate over the rows
+        """
+        return self.iter_rows()
+
+    def iter_rows(self, start: int = 0, chunk: int = 1024):
+        """
+        Iterate over the rows from a row index on, decoding `chunk` rows
+        at a time.
+
+        Parameters:
+        - start (int): The index of the first row. Default is 0.
+        - chunk (int): The number of rows decoded together. Default is 1024.
+
+        Yields:
+        List: The rows, as lists of strings.
+        """
+        for i in range(start, len(self), chunk):
+            yield from self[i:i + chunk]
+
+    def close(self) -> None:
+        """Unmap the file
+        """
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+
+    def _parse(self, start: int, end: int) -> List[List]:
+        """
+        Parse the rows stored between two byte offsets.
+        """
+        text = self.data[start:end].decode("utf-8")
+        return list(csv.reader(io.StringIO(text, newline="")))
+
+    def _build_index(self) -> array:
+        """
+        Scan the file for the offset of every row, after the header.
+
+        A newline inside a quoted field does not end a row: a line with an
+        odd number of quotes is joined with the next one.
+        """
+        data = self.data
+        size = len(data)
+        offsets = array("Q")
+        pos = 0
+        while pos < size:
+            offsets.append(pos)
+            start = pos
+            end = data.find(b"\n", pos)
+            while end >= 0 and data[start:end].count(b'"') % 2:
+                end = data.find(b"\n", end + 1)
+            pos = size if end < 0 else end + 1
+        offsets.append(size)
+        # The header is not a row
+        return offsets[1:] if len(offsets) > 1 else offsets
+
+    def _load_index(self) -> array:
+        """
+        Read the saved index if it was built from the current file.
+
+        Returns:
+        array: The row offsets, or None if there is no usable index.
+        """
+        header = INDEX_MAGIC + array("Q", self.stamp).tobytes()
+        try:
+            with open(self.index_path, "rb") as f:
+                if f.read(len(header)) != header:
+                    return None
+                offsets = array("Q")
+                offsets.frombytes(f.read())
+        except (OSError, ValueError):
+            return None
+        return offsets if offsets else None
+
+    def _save_index(self) -> None:
+        """
+        Write the index next to the file. The index is only a cache, so
+        a read-only directory just means it is rebuilt next time.
+        """
+        tmp = "{}.{}.tmp".format(self.index_path, os.getpid())
+        try:
+            with open(tmp, "wb") as f:
+                f.write(INDEX_MAGIC)
+                f.write(array("Q", self.stamp).tobytes())
+                f.write(self.offsets.tobytes())
+            os.replace(tmp, self.index_path)
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Packed Dataset
+
+This module lays a ColumnarDataset out in one flat buffer, and reads it
+back without copying, so the buffer can live in shared memory or in a
+memory-mapped file.
+"""
+
+import json
+import mmap
+import os
+import struct
+from array import array
+
+ColumnarDataset = __import__('columnar').ColumnarDataset
+Column = __import__('columnar').Column
+
+MAGIC = b"PDS1"
+PREFIX = struct.Struct("<4sI")
+ALIGN = 8
+
+
+class StringTable:
+    """The distinct strings of a packed column.
+
+    The strings are stored as one UTF-8 blob and an array of the offset
+    at which each one starts. A string is only decoded when it is read.
+    """
+
+    def __init__(self, offsets: memoryview, blob: memoryview):
+        """
+        Initialize the StringTable.
+
+        Parameters:
+        - offsets (memoryview): The start of each string in the blob,
+          followed by the end of the blob.
+        - blob (memoryview): The encoded strings.
+        """
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self) -> int:
+        """Number of strings
+        """
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        """
+        Decode one string.
+        """
+        offsets = self.offsets
+        return str(self.blob[offsets[index]:offsets[index + 1]], "utf-8")
+
+
+def pack(dataset: ColumnarDataset, source: list = None) -> bytearray:
+    """
+    Lay a ColumnarDataset out in one buffer.
+
+    The buffer starts with the magic number, the length of a JSON
+    description of the columns and that description. Then come the
+    sections, each aligned on 8 bytes: the array of every column and,
+    for dictionary encoded columns, the offsets and blob of their
+    StringTable. Arrays are in the byte order of the machine, so a
+    buffer is read back on the same architecture.
+
+    Parameters:
+    - dataset (ColumnarDataset): The dataset to pack.
+    - source (list): The [size, mtime_ns] of the file the dataset was
+      read from, kept in the description, see packed_source. Default is
+      None.
+
+    Returns:
+    bytearray: The packed dataset.
+    """
+    sections = []
+    columns = []
+    for name, column in zip(dataset.header, dataset.columns):
+        meta = {"name": name, "typecode": memoryview(column.data).format,
+                "data": len(sections)}
+        sections.append(bytes(column.data))
+        if column.values is not None:
+            blobs = [value.encode("utf-8") for value in column.values]
+            offsets = array("Q", [0])
+            for blob in blobs:
+                offsets.append(offsets[-1] + len(blob))
+            meta["offsets"] = len(sections)
+            sections.append(offsets.tobytes())
+            meta["blob"] = len(sections)
+            sections.append(b"".join(blobs))
+        columns.append(meta)
+
+    # The description holds the position of every section, which shifts
+    # the sections by its own length: fill it in until it is stable
+    description = b""
+    while True:
+        spans, position = [], align(PREFIX.size + len(description))
+        for section in sections:
+            spans.append([position, len(section)])
+            position = align(position + len(section))
+        encoded = json.dumps({"rows": len(dataset), "columns": columns,
+                              "spans": spans,
+                              "source": source}).encode("utf-8")
+        if encoded == description:
+            break
+        description = encoded
+
+    buffer = bytearray(position)
+    PREFIX.pack_into(buffer, 0, MAGIC, len(description))
+    buffer[PREFIX.size:PREFIX.size + len(description)] = description
+    for (start, size), section in zip(spans, sections):
+        buffer[start:start + size] = section
+    return buffer
+
+
+def unpack(buffer, owner: object = None) -> ColumnarDataset:
+    """
+    Read a packed dataset without copying its columns.
+
+    Only the description is parsed, so this takes the same time whatever
+    the number of rows.
+
+    Parameters:
+    - buffer (buffer): A buffer written by pack, such as a memoryview of
+      a shared memory segment or of a memory-mapped file.
+    - owner (object): What keeps the buffer alive, kept by the dataset.
+
+    Returns:
+    ColumnarDataset: The dataset, reading its rows from the buffer.
+    """
+    view = memoryview(buffer)
+    description = read_description(view)
+    sections = [view[start:start + size]
+                for start, size in description["spans"]]
+    header, columns = [], []
+    for meta in description["columns"]:
+        data = sections[meta["data"]].cast(meta["typecode"])
+        values = None
+        if "offsets" in meta:
+            values = StringTable(sections[meta["offsets"]].cast("Q"),
+                                 sections[meta["blob"]])
+        header.append(meta["name"])
+        columns.append(Column(data, values))
+    return ColumnarDataset(header, columns, owner)
+
+
+def read_description(view: memoryview) -> dict:
+    """
+    Parse the description at the start of a packed dataset.
+    """
+    magic, length = PREFIX.unpack_from(view, 0)
+    if magic != MAGIC:
+        raise ValueError("Not a packed dataset")
+    return json.loads(str(view[PREFIX.size:PREFIX.size + length], "utf-8"))
+
+
+def write_packed(dataset: ColumnarDataset, target: str,
+                 source: list = None) -> None:
+    """
+    Pack a dataset into a file.
+
+    The file is written under a temporary name and renamed into place,
+    so a process opening it never sees a partial dataset.
+
+    Parameters:
+    - dataset (ColumnarDataset): The dataset to pack.
+    - target (str): The file to write.
+    - source (list): The [size, mtime_ns] of the file the dataset was
+      read from, see pack. Default is None.
+    """
+    buffer = pack(dataset, source)
+    tmp = "{}.{}.tmp".format(target, os.getpid())
+    with open(tmp, "wb") as f:
+        f.write(buffer)
+    os.replace(tmp, target)
+
+
+def open_packed(target: str) -> ColumnarDataset:
+    """
+    Page over a packed dataset file without copying or parsing it.
+
+    The file is mapped read-only, so every process opening it shares the
+    same physical pages, and only the description is read up front.
+
+    Parameters:
+    - target (str): A file written by write_packed.
+
+    Returns:
+    ColumnarDataset: The dataset, reading its rows from the mapping.
+    """
+    with open(target, "rb") as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return unpack(mapping, mapping)
+
+
+def packed_source(target: str) -> list:
+    """
+    Return the [size, mtime_ns] of the file a packed dataset file was
+    made from, or None if it was not recorded.
+    """
+    with open(target, "rb") as f:
+        length = PREFIX.unpack(f.read(PREFIX.size))[1]
+        f.seek(0)
+        view = memoryview(f.read(PREFIX.size + length))
+    return read_description(view).get("source")
+
+
+def align(position: int) -> int:
+    """
+    Round a position up to the next multiple of ALIGN.
+    """
+    return -(-position // ALIGN) * ALIGN
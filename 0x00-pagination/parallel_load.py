@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Parallel CSV Loading
+
+This module parses a CSV file on several cores: the file is cut into
+chunks at line boundaries, a process pool parses the chunks, and the
+results are put back together in file order.
+"""
+
+import csv
+import io
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
+
+columnar = __import__('columnar')
+
+CHUNKS_PER_WORKER = 4
+
+
+def split_lines(path: str, chunks: int,
+                size: int = None) -> Tuple[int, List[Tuple[int, int]]]:
+    """
+    Cut a CSV file into byte ranges that start and end on a line.
+
+    Rows are assumed not to contain newlines inside quoted fields, which
+    a boundary could split.
+
+    Parameters:
+    - path (str): The CSV file.
+    - chunks (int): How many ranges to aim for.
+    - size (int): Cut only the first size bytes. Default is the whole
+      file.
+
+    Returns:
+    Tuple[int, List[Tuple[int, int]]]: The length of the header line,
+    and the (start, end) ranges of the rest of the file.
+    """
+    if size is None:
+        size = os.path.getsize(path)
+    with open(path, "rb") as f:
+        header = len(f.readline())
+        bounds = [header]
+        step = max(1, (size - header) // chunks)
+        for target in range(header + step, size, step):
+            if target <= bounds[-1]:
+                continue
+            f.seek(target - 1)
+            f.readline()
+            if f.tell() >= size:
+                break
+            bounds.append(f.tell())
+    bounds.append(size)
+    return header, [(start, end) for start, end in zip(bounds, bounds[1:])
+                    if start < end]
+
+
+def parse_chunk(path: str, start: int, end: int) -> List[List]:
+    """
+    Parse the rows stored between two byte offsets.
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8")
+    return list(csv.reader(io.StringIO(text, newline="")))
+
+
+def encode_chunk(path: str, start: int, end: int,
+                 width: int) -> List[Tuple[array, List[str]]]:
+    """
+    Parse the rows between two byte offsets into dictionary encoded
+    columns, see columnar.encode_rows. They travel back from a worker
+    much faster than rows.
+    """
+    return columnar.encode_rows(parse_chunk(path, start, end), width)
+
+
+def read_rows_parallel(path: str, workers: int = None,
+                       size: int = None) -> List[List]:
+    """
+    Parse a whole CSV file into a list of rows, header excluded, on
+    several processes.
+
+    Parameters:
+    - path (str): The CSV file.
+    - workers (int): The number of processes. Default is the number of
+      CPUs.
+    - size (int): Parse only the first size bytes. Default is the whole
+      file.
+
+    Returns:
+    List[List]: The rows, in file order.
+    """
+    workers = workers or os.cpu_count() or 1
+    _, ranges = split_lines(path, workers * CHUNKS_PER_WORKER, size)
+    starts = [start for start, _ in ranges]
+    ends = [end for _, end in ranges]
+    rows = []
+    with ProcessPoolExecutor(workers) as pool:
+        for chunk in pool.map(parse_chunk, [path] * len(ranges), starts,
+                              ends):
+            rows.extend(chunk)
+    return rows
+
+
+def read_columnar_parallel(path: str,
+                           workers: int = None) -> "columnar.ColumnarDataset":
+    """
+    Parse a whole CSV file into a ColumnarDataset on several processes.
+
+    Each worker dictionary encodes its chunk; the codes of every chunk
+    are then mapped to codes of the whole column, in C with map().
+
+    Parameters:
+    - path (str): The CSV file.
+    - workers (int): The number of processes. Default is the number of
+      CPUs.
+
+    Returns:
+    ColumnarDataset: The dataset, rows in file order.
+    """
+    workers = workers or os.cpu_count() or 1
+    header_length, ranges = split_lines(path, workers * CHUNKS_PER_WORKER)
+    header = parse_chunk(path, 0, header_length)
+    header = header[0] if header else []
+    width = len(header)
+    dictionaries = [{} for _ in header]
+    codes = [array("I") for _ in header]
+    starts = [start for start, _ in ranges]
+    ends = [end for _, end in ranges]
+    with ProcessPoolExecutor(workers) as pool:
+        for chunk in pool.map(encode_chunk, [path] * len(ranges), starts,
+                              ends, [width] * len(ranges)):
+            for dictionary, column, (chunk_codes, values) in zip(
+                    dictionaries, codes, chunk):
+                mapping = [dictionary.setdefault(value, len(dictionary))
+                           for value in values]
+                column.extend(map(mapping.__getitem__, chunk_codes))
+    return columnar.ColumnarDataset(header, [
+        columnar.Column.encode(column, list(dictionary))
+        for column, dictionary in zip(codes, dictionaries)])
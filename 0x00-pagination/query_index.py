@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Query Index
+
+This module provides the QueryIndex class, the secondary indexes that
+serve filtered and sorted pages of the baby names dataset.
+"""
+
+import bisect
+import collections
+import itertools
+from array import array
+from typing import Dict, List, Sequence
+
+YEAR, GENDER, ETHNICITY, NAME, COUNT, RANK = range(6)
+FILTERS = {"year": YEAR, "gender": GENDER, "ethnicity": ETHNICITY}
+SORTS = (None, "count", "rank", "name")
+
+
+def to_int(cell: str) -> int:
+    """
+    Read a numeric cell, 0 if it is not a number.
+    """
+    try:
+        return int(cell)
+    except ValueError:
+        return 0
+
+
+def group_orders(values: List[tuple], orders: Dict[str, Sequence[int]],
+                 subset: tuple, lists: Dict[tuple, array]) -> Dict:
+    """
+    Sort every order of the row ids by the group of their values.
+
+    Parameters:
+    - values (List[tuple]): The group of each row.
+    - orders (Dict[str, Sequence[int]]): The row ids in each order.
+    - subset (tuple): The filter columns of the groups.
+    - lists (Dict[tuple, array]): Receives the ids of each order, under
+      (subset, sort).
+
+    Returns:
+    Dict: The (start, end) range of each group in the lists.
+    """
+    codes = {value: code for code, value in enumerate(sorted(set(values)))}
+    group = array("i", (codes[value] for value in values))
+    sizes = collections.Counter(group)
+    ranges, start = {}, 0
+    for value, code in codes.items():
+        ranges[value] = (start, start + sizes[code])
+        start += sizes[code]
+    # Sorting an order by group keeps it within each group
+    for sort, order in orders.items():
+        lists[subset, sort] = array("i", sorted(order, key=group.__getitem__))
+    return ranges
+
+
+class Selection:
+    """The ids of the rows matching a query, in the order of the query.
+
+    The ids are the range [lo, hi) of an id array, read backwards for a
+    descending order, so len() and a page are cheap.
+    """
+
+    def __init__(self, ids: array, lo: int = 0, hi: int = None,
+                 descending: bool = False):
+        """
+        Initialize the Selection.
+
+        Parameters:
+        - ids (array): Ids in ascending query order.
+        - lo (int): The first position of the range. Default is 0.
+        - hi (int): The position after the range. Default is len(ids).
+        - descending (bool): Read the range backwards. Default is False.
+        """
+        self.ids = ids
+        self.lo = lo
+        self.hi = len(ids) if hi is None else hi
+        self.descending = descending
+
+    def __len__(self) -> int:
+        """Number of rows matching
+        """
+        return max(0, self.hi - self.lo)
+
+    def page(self, start: int, end: int) -> List[int]:
+        """
+        Return the ids at positions start to end - 1 of the selection.
+        """
+        end = min(end, len(self))
+        if start >= end:
+            return []
+        if self.descending:
+            return self.ids[self.hi - end:self.hi - start].tolist()[::-1]
+        return self.ids[self.lo + start:self.lo + end].tolist()
+
+
+class QueryIndex:
+    """Secondary indexes over the year, gender, ethnicity, name, count and
+    rank columns of the baby names dataset.
+
+    For every subset of the filter columns (year, gender, ethnicity) and
+    every query order (file order, count, rank and name), an array holds
+    the row ids grouped by the values of the subset, each group sorted
+    in the order. So any combination of filters is one range of one
+    array, already in order, and a page of it is a slice, O(page_size),
+    with its exact length for total_pages. A name prefix is a range of
+    the name-sorted array, found in O(log n). For the other orders, a
+    one letter prefix, which can match a large share of the rows, is a
+    range of another set of arrays, grouped by the first letter of the
+    name as well. A longer prefix in another order than the name sorts
+    its m matching rows, O(m log m).
+
+    The arrays take 4 bytes per row for each of the 8 filter subsets and
+    4 orders, plus 3 orders by first letter, 224 bytes a row, and are
+    built once in O(n log n).
+    """
+
+    def __init__(self, dataset: Sequence[List]):
+        """
+        Build the indexes of a dataset.
+
+        Parameters:
+        - dataset (Sequence[List]): The rows, in the columns of
+          Popular_Baby_Names.csv.
+        """
+        self.dataset = dataset
+        cells = {column: [] for column in FILTERS.values()}
+        counts, ranks, names = array("q"), array("q"), []
+        for row in dataset:
+            for column, values in cells.items():
+                values.append(row[column] if column < len(row) else "")
+            counts.append(to_int(row[COUNT]) if COUNT < len(row) else 0)
+            ranks.append(to_int(row[RANK]) if RANK < len(row) else 0)
+            names.append(row[NAME].casefold() if NAME < len(row) else "")
+        size = len(names)
+        self.names = sorted(set(names))
+        codes = {name: code for code, name in enumerate(self.names)}
+        self.name_codes = array("i", (codes[name] for name in names))
+        del names, codes
+
+        keys = {"count": counts, "rank": ranks, "name": self.name_codes}
+        self.sort_keys = keys
+        orders = {None: range(size)}
+        for sort, key in keys.items():
+            # sorted is stable, so ties stay in file order
+            orders[sort] = sorted(range(size), key=key.__getitem__)
+
+        initials = [name[:1] for name in self.names]
+        initials = [initials[code] for code in self.name_codes]
+        initial_orders = {sort: order for sort, order in orders.items()
+                          if sort != "name"}
+
+        self.lists = {}
+        self.groups = {}
+        self.initial_lists = {}
+        self.initial_groups = {}
+        for width in range(len(FILTERS) + 1):
+            for subset in itertools.combinations(sorted(FILTERS), width):
+                columns = [cells[FILTERS[name]] for name in subset]
+                values = list(zip(*columns)) if columns else [()] * size
+                self.groups[subset] = group_orders(
+                    values, orders, subset, self.lists)
+                values = [value + (initial,)
+                          for value, initial in zip(values, initials)]
+                self.initial_groups[subset] = group_orders(
+                    values, initial_orders, subset, self.initial_lists)
+
+    def select(self, filters: Dict[str, object] = None,
+               name_prefix: str = None, sort: str = None,
+               descending: bool = False) -> Selection:
+        """
+        Select the rows matching a query.
+
+        Parameters:
+        - filters (Dict[str, object]): Exact values of year, gender or
+          ethnicity, by column name. None values are ignored.
+        - name_prefix (str): The start of the names to keep, ignoring
+          case. Default is None.
+        - sort (str): None for file order, "count", "rank" or "name".
+        - descending (bool): Reverse the order. Default is False.
+
+        Returns:
+        Selection: The ids of the matching rows, in order.
+        """
+        filters = {name: str(value) for name, value in (filters or {}).items()
+                   if value is not None}
+        unknown = set(filters) - set(FILTERS)
+        if unknown:
+            raise ValueError("Unknown filters: {}".format(sorted(unknown)))
+        if sort not in SORTS:
+            raise ValueError("Unknown sort: {!r}".format(sort))
+        subset = tuple(sorted(filters))
+        value = tuple(filters[name] for name in subset)
+
+        lo, hi = self.groups[subset].get(value, (0, 0))
+        if not name_prefix:
+            return Selection(self.lists[subset, sort], lo, hi, descending)
+
+        ids = self.lists[subset, "name"]
+        prefix = name_prefix.casefold()
+        first = bisect.bisect_left(self.names, prefix)
+        last = bisect.bisect_left(self.names, prefix + chr(0x10ffff))
+        key = self.name_codes.__getitem__
+        lo = bisect.bisect_left(ids, first, lo, hi, key=key)
+        hi = bisect.bisect_left(ids, last, lo, hi, key=key)
+        if sort == "name":
+            return Selection(ids, lo, hi, descending)
+        if len(prefix) == 1:
+            lo, hi = self.initial_groups[subset].get(value + (prefix,),
+                                                     (0, 0))
+            return Selection(self.initial_lists[subset, sort], lo, hi,
+                             descending)
+        matching = sorted(ids[lo:hi])
+        if sort is not None:
+            matching.sort(key=self.sort_keys[sort].__getitem__)
+        return Selection(array("i", matching), descending=descending)
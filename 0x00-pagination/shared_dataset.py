@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Shared Dataset
+
+This module keeps one packed copy of a dataset in shared memory, as a
+read-only memory-mapped file that the Servers of every worker process
+page over.
+"""
+
+import csv
+import fcntl
+import glob
+import hashlib
+import os
+import tempfile
+
+ColumnarDataset = __import__('columnar').ColumnarDataset
+packed_dataset = __import__('packed_dataset')
+
+if os.path.isdir("/dev/shm"):
+    SHARED_DIR = "/dev/shm"
+else:
+    SHARED_DIR = tempfile.gettempdir()
+
+
+def shared_prefix(path: str) -> str:
+    """
+    Return the start of the name of every published version of a CSV
+    file: pds_ and a hash of the absolute path of the file, then _.
+    """
+    source = hashlib.sha1(os.path.abspath(path).encode("utf-8"))
+    return os.path.join(SHARED_DIR, "pds_{}_".format(
+        source.hexdigest()[:12]))
+
+
+def shared_path(path: str) -> str:
+    """
+    Return where the packed dataset of a CSV file is published.
+
+    The name is shared_prefix(path) followed by a hash of the size and
+    modification time of the file, so that a new version of the file
+    gets a new name and the old versions can be found.
+
+    Parameters:
+    - path (str): The CSV file.
+
+    Returns:
+    str: A file in SHARED_DIR.
+    """
+    stat = os.stat(path)
+    version = hashlib.sha1("{}:{}".format(
+        stat.st_size, stat.st_mtime_ns).encode("utf-8"))
+    return "{}{}.bin".format(shared_prefix(path), version.hexdigest()[:12])
+
+
+def publish_dataset(path: str, target: str = None) -> str:
+    """
+    Parse a CSV file and publish its packed dataset.
+
+    The dataset is written to a temporary file renamed into place, so
+    a process never maps a partial dataset. When published to
+    shared_path(path), the older versions of the dataset are removed;
+    processes still mapping them keep them until they unmap them.
+
+    Parameters:
+    - path (str): The CSV file.
+    - target (str): Where to publish. Default is shared_path(path).
+
+    Returns:
+    str: The published file.
+    """
+    default = shared_path(path)
+    target = target or default
+    with open(path) as f:
+        dataset = ColumnarDataset.from_rows(csv.reader(f))
+    packed_dataset.write_packed(dataset, target)
+    if target == default:
+        remove_versions(path, keep=target)
+    return target
+
+
+def unpublish_dataset(path: str) -> int:
+    """
+    Remove every published version of the dataset of a CSV file, and its
+    lock file, for instance once the file is deleted. Processes still
+    mapping them keep them until they unmap them.
+
+    Parameters:
+    - path (str): The CSV file. It does not need to exist anymore.
+
+    Returns:
+    int: The number of datasets removed.
+    """
+    removed = remove_versions(path)
+    try:
+        os.remove(shared_prefix(path) + "lock")
+    except OSError:
+        pass
+    return removed
+
+
+def remove_versions(path: str, keep: str = None) -> int:
+    """
+    Remove the published versions of a CSV file, but keep.
+    """
+    removed = 0
+    for old in glob.glob(glob.escape(shared_prefix(path)) + "*.bin"):
+        if old != keep:
+            try:
+                os.remove(old)
+                removed += 1
+            except OSError:
+                pass
+    return removed
+
+
+def open_shared(path: str) -> ColumnarDataset:
+    """
+    Map the published dataset of a CSV file, publishing it first if no
+    process did.
+
+    Processes starting together take turns on a lock file next to the
+    datasets, so only the first one parses the CSV file and the others
+    map what it published: every process maps the same copy.
+
+    Parameters:
+    - path (str): The CSV file.
+
+    Returns:
+    ColumnarDataset: The dataset, reading its rows from shared memory.
+    """
+    target = shared_path(path)
+    try:
+        return packed_dataset.open_packed(target)
+    except FileNotFoundError:
+        pass
+    with open(shared_prefix(path) + "lock", "a") as lock:
+        # Released when the lock file is closed
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if not os.path.exists(target):
+            publish_dataset(path, target)
+        return packed_dataset.open_packed(target)
@@ -7,28 +7,13 @@ from base_caching import BaseCaching
 
 class FIFOCache(BaseCaching):
     """ FIFOCache class inherits from BaseCaching
-    """
-
-    def __init__(self):
-        """ Initialize FIFOCache
-        """
-        super().__init__()
-        self.order = []
 
-    def put(self, key, item):
-        """ Add an item in the cache
-        """
-        if key is not None and item is not None:
-            if len(self.cache_data) >= BaseCaching.MAX_ITEMS:
-                # FIFO: Discard the first item
-                discarded_key = self.order.pop(0)
-                del self.cache_data[discarded_key]
-                print("DISCARD:", discarded_key)
-            self.cache_data[key] = item
-            self.order.append(key)
+    cache_data keeps keys in insertion order, and updating an item does
+    not change that order, so the first key of cache_data is the first
+    item put in the cache.
+    """
 
-    def get(self, key):
-        """ Get an item by key
+    def _victim(self):
+        """ FIFO: Discard the first item
         """
-        if key is not None:
-            return self.cache_data.get(key)
+        return next(iter(self.cache_data))
@@ -6,6 +6,7 @@ implements a Least Frequently Used (LFU) caching system.
 """
 
 from base_caching import BaseCaching
+from slot_lists import SlotLists
 
 
 class LFUCache(BaseCaching):
@@ -14,78 +15,68 @@ class LFUCache(BaseCaching):
     It discards the least frequently used items first. In case of a tie,
     the least recently used item is discarded.
     """
+    SNAPSHOT_STATE = ("buckets", "min_freq")
 
-    def __init__(self):
+    def __init__(self, **kwargs):
         """
         Initialize the LFUCache instance.
+
+        buckets keeps one list per use count, holding the keys that have
+        it, least recently used first; the id of the list of a key is its
+        use count. min_freq is the lowest count that has a list.
         """
-        super().__init__()
-        self.frequency = {}
-        self.recency = {}
-        self.time = 0
+        super().__init__(**kwargs)
+        self.buckets = SlotLists()
+        self.min_freq = 0
 
-    def put(self, key, item):
+    def _on_insert(self, key):
         """
-        Add an item in the cache.
+        Start a new key in the frequency 1 bucket.
 
         Args:
-            key (str): The key under which the item is stored.
-            item (any): The item to store in the cache.
+            key (str): A key just stored in the cache.
         """
-        if key is None or item is None:
-            return
-
-        if key in self.cache_data:
-            self.cache_data[key] = item
-            self.frequency[key] += 1
-            self.recency[key] = self.time
-            self.time += 1
-        else:
-            if len(self.cache_data) >= BaseCaching.MAX_ITEMS:
-                # Find the LFU item
-                min_freq = min(self.frequency.values())
-                lfu_keys = [
-                    k for k,
-                    v in self.frequency.items()
-                    if v == min_freq]
-
-                if len(lfu_keys) > 1:
-                    # If there's a tie, use LRU to decide which one to discard
-                    lru_key = min(lfu_keys, key=lambda k: self.recency[k])
-                else:
-                    lru_key = lfu_keys[0]
+        self.buckets.append(key, 1)
+        self.min_freq = 1
 
-                del self.cache_data[lru_key]
-                del self.frequency[lru_key]
-                del self.recency[lru_key]
-                print(f"DISCARD: {lru_key}")
+    def _victim(self):
+        """
+        Choose the least frequently used key for eviction. The LFU bucket
+        holds the LRU key of that frequency first, which breaks ties.
 
-            self.cache_data[key] = item
-            self.frequency[key] = 1
-            self.recency[key] = self.time
-            self.time += 1
+        Returns:
+            str: The key to discard.
+        """
+        if not self.buckets.size(self.min_freq):
+            self.min_freq = min(self.buckets.heads)
+        return self.buckets.first(self.min_freq)
 
-    def get(self, key):
+    def _on_remove(self, key, evicted=False):
         """
-        Get an item by key from the cache.
+        Take a key out of its frequency bucket.
+
+        When this empties the lowest bucket, min_freq is left dangling:
+        an eviction is followed by an insert that resets it to 1, and
+        _victim only searches the distinct frequencies if it is still
+        dangling.
 
         Args:
-            key (str): The key to look up in the cache.
+            key (str): A key about to leave the cache.
+            evicted (bool): Whether the key was evicted.
+        """
+        self.buckets.remove(key)
 
-        Returns:
-            any: The item stored under the key/None if the key doesn't exist.
+    def _on_access(self, key):
         """
-        if key is not None and key in self.cache_data:
-            self.frequency[key] += 1
-            self.recency[key] = self.time
-            self.time += 1
-            return self.cache_data[key]
-        return None
+        Move a key to the next frequency bucket, as most recently used.
 
-    def lru_discard(self):
-        """ LRU Discard helper function """
-        lru_key = min(self.recency, key=self.recency.get)
-        del self.cache_data[lru_key]
-        del self.frequency[lru_key]
-        del self.recency[lru_key]
-        print(f"DISCARD: {lru_key}")
+        Args:
+            key (str): A key present in the cache.
+        """
+        freq = self.buckets.list_of(key)
+        if freq == SlotLists.MAX_LIST_ID:
+            self.buckets.move(key, freq)
+            return
+        self.buckets.move(key, freq + 1)
+        if self.min_freq == freq and not self.buckets.size(freq):
+            self.min_freq = freq + 1
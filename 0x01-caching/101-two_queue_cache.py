@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+two_queue_cache.py
+This module provides a TwoQueueCache class that inherits from BaseCaching
+and implements the scan-resistant 2Q caching system.
+"""
+
+from base_caching import BaseCaching
+from slot_lists import SlotLists
+
+A1IN, AM, A1OUT = 0, 1, 2
+
+
+class TwoQueueCache(BaseCaching):
+    """
+    TwoQueueCache is a caching system that inherits from BaseCaching.
+
+    New keys enter a small FIFO queue, a1in. Keys discarded from a1in are
+    remembered, without their item, in the ghost FIFO a1out. Only a key
+    seen again while it is in a1out is promoted to the LRU queue am, so
+    a long scan of keys used once only flushes a1in and leaves the hot
+    working set in am untouched. Every operation is O(1).
+
+    The three queues are the lists A1IN, AM and A1OUT of one SlotLists.
+    """
+    KIN = 0.25
+    KOUT = 0.5
+    SNAPSHOT_STATE = ("queues",)
+
+    def __init__(self, **kwargs):
+        """
+        Initialize the TwoQueueCache instance.
+        """
+        super().__init__(**kwargs)
+        self.queues = SlotLists()
+
+    def _capacity(self):
+        """
+        Return the number of items the queue sizes are relative to.
+
+        Returns:
+            int: max_items, or the current size of a byte-bounded cache.
+        """
+        if self.max_items is not None:
+            return self.max_items
+        return len(self.cache_data)
+
+    def _on_insert(self, key):
+        """
+        Queue a new key in am if it is remembered in a1out, else in a1in.
+
+        Args:
+            key (str): A key just stored in the cache.
+        """
+        if key in self.queues:
+            self.queues.move(key, AM)
+        else:
+            self.queues.append(key, A1IN)
+
+    def _on_access(self, key):
+        """
+        Mark a key of am as the most recently used. Hits in a1in are
+        left alone, as they are usually correlated with the first use.
+
+        Args:
+            key (str): A key present in the cache.
+        """
+        if self.queues.list_of(key) == AM:
+            self.queues.move(key, AM)
+
+    def _victim(self):
+        """
+        Choose the oldest key of a1in while a1in is over its share of the
+        cache, else the least recently used key of am.
+
+        Returns:
+            str: The key to discard.
+        """
+        kin = max(1, int(self._capacity() * self.KIN))
+        a1in = self.queues.size(A1IN)
+        if a1in and (a1in > kin or not self.queues.size(AM)):
+            return self.queues.first(A1IN)
+        return self.queues.first(AM)
+
+    def _on_remove(self, key, evicted=False):
+        """
+        Take a key out of its queue, remembering it in a1out if it was
+        evicted from a1in. A key deleted, expired or dropped for its size
+        is forgotten, so putting it again does not promote it to am.
+
+        Args:
+            key (str): A key about to leave the cache.
+            evicted (bool): Whether the policy chose to discard the key.
+        """
+        if not evicted or self.queues.list_of(key) == AM:
+            self.queues.remove(key)
+            return
+        self.queues.move(key, A1OUT)
+        kout = max(1, int(self._capacity() * self.KOUT))
+        while self.queues.size(A1OUT) > kout:
+            self.queues.remove(self.queues.first(A1OUT))
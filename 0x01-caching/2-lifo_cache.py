@@ -2,33 +2,33 @@
 """ LIFOCache module
 """
 
+from collections import OrderedDict
 from base_caching import BaseCaching
 
 
 class LIFOCache(BaseCaching):
     """ LIFOCache class inherits from BaseCaching
+
+    cache_data is an OrderedDict whose last key is the last item put in
+    the cache, either as a new key or as an update.
     """
 
-    def __init__(self):
+    def __init__(self, **kwargs):
         """ Initialize LIFOCache
         """
-        super().__init__()
-        self.order = []
+        super().__init__(**kwargs)
+        self.cache_data = OrderedDict()
+
+    def _on_update(self, key):
+        """ An updated item becomes the last item put
+        """
+        self.cache_data.move_to_end(key)
 
-    def put(self, key, item):
-        """ Add an item in the cache
+    def _on_access(self, key):
+        """ Reading an item does not change the LIFO order
         """
-        if key is not None and item is not None:
-            if len(self.cache_data) >= BaseCaching.MAX_ITEMS:
-                # LIFO: Discard the last item
-                discarded_key = self.order.pop()
-                del self.cache_data[discarded_key]
-                print("DISCARD:", discarded_key)
-            self.cache_data[key] = item
-            self.order.append(key)
-
-    def get(self, key):
-        """ Get an item by key
+
+    def _victim(self):
+        """ LIFO: Discard the last item
         """
-        if key is not None:
-            return self.cache_data.get(key)
+        return next(reversed(self.cache_data))
@@ -2,37 +2,30 @@
 """ LRUCache module
 """
 
+from collections import OrderedDict
 from base_caching import BaseCaching
 
 
 class LRUCache(BaseCaching):
     """ LRUCache class inherits from BaseCaching
+
+    cache_data is an OrderedDict kept in usage order: the least recently
+    used key is first, the most recently used key is last. Lookups,
+    updates and evictions are all O(1).
     """
 
-    def __init__(self):
+    def __init__(self, **kwargs):
         """ Initialize LRUCache
         """
-        super().__init__()
-        self.order = []
+        super().__init__(**kwargs)
+        self.cache_data = OrderedDict()
 
-    def put(self, key, item):
-        """ Add an item in the cache
+    def _on_access(self, key):
+        """ Update order to indicate recent usage
         """
-        if key is not None and item is not None:
-            if len(self.cache_data) >= BaseCaching.MAX_ITEMS:
-                # LRU: Discard the least recently used item
-                discarded_key = self.order.pop(0)
-                del self.cache_data[discarded_key]
-                print("DISCARD:", discarded_key)
-            self.cache_data[key] = item
-            self.order.append(key)
+        self.cache_data.move_to_end(key)
 
-    def get(self, key):
-        """ Get an item by key
+    def _victim(self):
+        """ LRU: Discard the least recently used item
         """
-        if key is not None and key in self.cache_data:
-            # Update order to indicate recent usage
-            self.order.remove(key)
-            self.order.append(key)
-            return self.cache_data[key]
-        return None
+        return next(iter(self.cache_data))
@@ -5,6 +5,7 @@ This module provides an MRUCache class that inherits from BaseCaching and
 implements a Most Recently Used (MRU) caching system.
 """
 
+from collections import OrderedDict
 from base_caching import BaseCaching
 
 
@@ -12,46 +13,32 @@ class MRUCache(BaseCaching):
     """
     MRUCache is a caching system that inherits from BaseCaching.
     It discards the most recently used items when the cache exceeds its limit.
+
+    cache_data is an OrderedDict kept in usage order, so the most recently
+    used key is always the last one.
     """
 
-    def __init__(self):
+    def __init__(self, **kwargs):
         """
         Initialize the MRUCache instance.
         """
-        super().__init__()
-        self.mru_order = []
+        super().__init__(**kwargs)
+        self.cache_data = OrderedDict()
 
-    def put(self, key, item):
+    def _on_access(self, key):
         """
-        Add an item in the cache.
+        Mark a key as the most recently used.
 
         Args:
-            key (str): The key under which the item is stored.
-            item (any): The item to store in the cache.
-        """
-        if key is not None and item is not None:
-            if key in self.cache_data:
-                self.mru_order.remove(key)
-            elif len(self.cache_data) >= BaseCaching.MAX_ITEMS:
-                mru_key = self.mru_order.pop()
-                del self.cache_data[mru_key]
-                print(f"DISCARD: {mru_key}")
-
-            self.cache_data[key] = item
-            self.mru_order.append(key)
-
-    def get(self, key):
+            key (str): A key present in the cache.
         """
-        Get an item by key from the cache.
+        self.cache_data.move_to_end(key)
 
-        Args:
-            key (str): The key to look up in the cache.
+    def _victim(self):
+        """
+        Choose the most recently used key for eviction.
 
         Returns:
-            any: The item stored under the key/None if the key doesn't exist.
+            str: The key to discard.
         """
-        if key is not None and key in self.cache_data:
-            self.mru_order.remove(key)
-            self.mru_order.append(key)
-            return self.cache_data[key]
-        return None
+        return next(reversed(self.cache_data))
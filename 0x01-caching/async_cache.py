@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+async_cache.py
+This module provides an AsyncCache class that gives asyncio code an
+awaitable interface over any BaseCaching policy.
+"""
+
+import asyncio
+
+from memoize import NONE
+
+LRUCache = __import__('3-lru_cache').LRUCache
+
+
+class AsyncCache():
+    """
+    AsyncCache wraps a BaseCaching policy for asyncio code.
+
+    get_or_load coalesces misses: while a key is being loaded, every
+    other caller asking for it awaits the same load instead of starting
+    its own, so a burst of identical misses hits the backend once. An
+    AsyncCache belongs to the event loop its loads run on.
+    """
+
+    def __init__(self, cache=None):
+        """
+        Initialize the AsyncCache.
+
+        Args:
+            cache (BaseCaching): The store of the items, an LRUCache of
+                128 items by default.
+        """
+        if cache is None:
+            cache = LRUCache(max_items=128, on_evict=None)
+        self.cache = cache
+        self.in_flight = {}
+
+    async def get(self, key):
+        """
+        Get an item by key from the cache.
+
+        Args:
+            key (str): The key to look up in the cache.
+
+        Returns:
+            any: The item stored under the key/None if the key doesn't exist.
+        """
+        item = self.cache.get(key)
+        return None if item is NONE else item
+
+    async def put(self, key, item, ttl=None):
+        """
+        Add an item in the cache.
+
+        Args:
+            key (str): The key under which the item is stored.
+            item (any): The item to store in the cache.
+            ttl (float): How long the item stays valid, in seconds.
+        """
+        self.cache.put(key, item, ttl)
+
+    async def get_or_load(self, key, loader, ttl=None):
+        """
+        Get an item by key, loading it on a miss.
+
+        Args:
+            key (str): The key to look up in the cache.
+            loader (callable): Called without arguments on a miss, it
+                returns the awaitable that loads the item.
+            ttl (float): How long a loaded item stays valid, in seconds.
+
+        Returns:
+            any: The cached or loaded item. A load that raises raises to
+                every caller waiting for it, and nothing is cached.
+        """
+        item = self.cache.get(key)
+        if item is not None:
+            return None if item is NONE else item
+        task = self.in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load(key, loader, ttl))
+            self.in_flight[key] = task
+        # A cancelled caller must not cancel the load for the others
+        return await asyncio.shield(task)
+
+    async def _load(self, key, loader, ttl):
+        """
+        Run a loader and cache its result.
+        """
+        try:
+            item = await loader()
+            self.cache.put(key, NONE if item is None else item, ttl)
+            return item
+        finally:
+            del self.in_flight[key]
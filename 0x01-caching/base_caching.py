@@ -1,19 +1,112 @@
 #!/usr/bin/python3
 """ BaseCaching module
 """
+import heapq
+import itertools
+import pickle
+import sys
+import threading
+import time
+import zlib
+
+from cache_stats import CacheStats
+
+
+def write_snapshot(path, snapshot):
+    """ Write a snapshot dict to path
+    """
+    data = zlib.compress(pickle.dumps(snapshot, pickle.HIGHEST_PROTOCOL))
+    with open(path, "wb") as f:
+        f.write(BaseCaching.SNAPSHOT_MAGIC + data)
+
+
+def read_snapshot(path):
+    """ Read a snapshot dict written by write_snapshot
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    magic = BaseCaching.SNAPSHOT_MAGIC
+    if not data.startswith(magic):
+        raise ValueError("{} is not a cache snapshot".format(path))
+    return pickle.loads(zlib.decompress(data[len(magic):]))
+
+
+def print_discard(key, item):
+    """ Default eviction callback of the caches
+    """
+    print("DISCARD: {}".format(key))
 
 
 class BaseCaching():
     """ BaseCaching defines:
       - constants of your caching system
       - where your data are stored (in a dictionary)
+      - put and get, run under a per-instance lock so that every cache
+        class is safe to share between threads
+
+    Cache classes only describe their eviction policy by overriding the
+    hooks _on_insert, _on_access, _on_update, _on_remove and _victim.
+
+    Capacity is set per instance, in items (max_items) and/or in
+    approximate bytes (max_bytes, measured on each item by sizer,
+    sys.getsizeof by default). With neither, max_items is MAX_ITEMS; a
+    cache given only max_bytes has no item limit. A put discards items,
+    as chosen by the policy, until the new item fits in both budgets.
+
+    Items can expire: put takes a time-to-live in seconds (ttl, the
+    instance default when omitted). An expired item is dropped lazily
+    when it is read, and in bounded batches by reap, either from put
+    when the cache is full or from a background reaper thread. Deadlines
+    sit in a heap, so expiry never scans the whole cache.
+
+    Each discarded item is passed to on_evict(key, item), which prints
+    "DISCARD: key" by default; None disables it. With stats=True, a
+    CacheStats counts hits, misses, inserts, updates, evictions,
+    expirations, deletes and rejections, and times every public
+    operation; stats_snapshot returns them as a dict.
+
+    An admission filter, such as tinylfu.TinyLFU, can front any policy:
+    it records every requested key, and a new key that needs an eviction
+    is only cached if admission.admit(key, victim) says it is worth it.
+
+    dump and load save and restore the items together with the policy
+    state, so a restarted cache discards in the same order as before.
+    Cache classes list the attributes holding that state in
+    SNAPSHOT_STATE.
     """
     MAX_ITEMS = 4
+    SNAPSHOT_STATE = ()
+    SNAPSHOT_MAGIC = b"BCS1"
 
-    def __init__(self):
+    def __init__(self, max_items=None, max_bytes=None, sizer=None,
+                 ttl=None, on_evict=print_discard, stats=False,
+                 admission=None):
         """ Initiliaze
         """
         self.cache_data = {}
+        self.lock = threading.RLock()
+        if max_items is None and max_bytes is None:
+            max_items = self.MAX_ITEMS
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.sizer = sys.getsizeof if sizer is None else sizer
+        self.sizes = {}
+        self.nbytes = 0
+        self.ttl = ttl
+        self.deadlines = {}
+        self.expiry_heap = []
+        self.expiry_seq = itertools.count()
+        self.reaper = None
+        self.on_evict = on_evict
+        self.stats = CacheStats() if stats else None
+        self.admission = admission
+
+    @classmethod
+    def concurrent(cls, shards=16, **kwargs):
+        """ Return a lock-striped ConcurrentCache made of `shards`
+        instances of this cache class
+        """
+        return ConcurrentCache(cls, shards, **kwargs)
 
     def print_cache(self):
         """ Print the cache
@@ -22,14 +115,621 @@ class BaseCaching():
         for key in sorted(self.cache_data.keys()):
             print("{}: {}".format(key, self.cache_data.get(key)))
 
-    def put(self, key, item):
+    def put(self, key, item, ttl=None):
         """ Add an item in the cache
+
+        The item expires after ttl seconds, or after the default ttl of
+        the cache; with neither, it never expires. An item bigger than
+        max_bytes on its own is never cached.
         """
-        raise NotImplementedError(
-            "put must be implemented in your cache class")
+        if self.stats is not None:
+            return self._timed("put", self._put, key, item, ttl)
+        return self._put(key, item, ttl)
 
     def get(self, key):
         """ Get an item by key
         """
+        if self.stats is not None:
+            return self._timed("get", self._get, key)
+        return self._get(key)
+
+    def put_many(self, items, ttl=None):
+        """ Add many items in the cache, from a dict or (key, item) pairs
+
+        The room needed by the whole batch is made in a single eviction
+        pass before inserting it. If the new keys alone exceed the
+        capacity, only the last ones that fit are cached.
+        """
+        if self.stats is not None:
+            return self._timed("put_many", self._put_many, items, ttl)
+        return self._put_many(items, ttl)
+
+    def get_many(self, keys):
+        """ Get the items of many keys at once
+
+        Returns:
+            dict: The items found, by key. Missing keys are left out.
+        """
+        if self.stats is not None:
+            return self._timed("get_many", self._get_many, keys)
+        return self._get_many(keys)
+
+    def delete_many(self, keys):
+        """ Remove many keys from the cache
+
+        Returns:
+            int: The number of keys removed.
+        """
+        if self.stats is not None:
+            return self._timed("delete_many", self._delete_many, keys)
+        return self._delete_many(keys)
+
+    def stats_snapshot(self):
+        """ Return the statistics of the cache as a dict, or None when
+        the cache was created without stats=True
+        """
+        if self.stats is None:
+            return None
+        with self.lock:
+            return self.stats.snapshot()
+
+    def dump(self, path):
+        """ Save the items, their expiry and the policy state to path,
+        as a compressed pickle
+        """
+        with self.lock:
+            snapshot = self._snapshot()
+        write_snapshot(path, snapshot)
+
+    def load(self, path):
+        """ Replace the content of the cache with a snapshot saved by
+        dump. Items that expired meanwhile are dropped, and items that
+        no longer fit the capacity are discarded. Only load trusted
+        files, as they are unpickled.
+        """
+        snapshot = read_snapshot(path)
+        with self.lock:
+            self._restore(snapshot)
+
+    def _snapshot(self):
+        """ Return the content and policy state of the cache as a dict
+        """
+        now, wall = time.monotonic(), time.time()
+        return {
+            "policy": type(self).__name__,
+            "items": list(self.cache_data.items()),
+            "deadlines": {key: wall + deadline - now
+                          for key, deadline in self.deadlines.items()},
+            "state": {name: getattr(self, name)
+                      for name in self.SNAPSHOT_STATE},
+        }
+
+    def _restore(self, snapshot):
+        """ Replace the content and policy state of the cache
+        """
+        if snapshot["policy"] != type(self).__name__:
+            raise ValueError("snapshot of a {}, not of a {}".format(
+                snapshot["policy"], type(self).__name__))
+        self.cache_data.clear()
+        self.cache_data.update(snapshot["items"])
+        for name, value in snapshot["state"].items():
+            setattr(self, name, value)
+        self.sizes = {}
+        self.nbytes = 0
+        if self.max_bytes is not None:
+            self.sizes = {key: self.sizer(item)
+                          for key, item in self.cache_data.items()}
+            self.nbytes = sum(self.sizes.values())
+        self.deadlines = {}
+        self.expiry_heap = []
+        wall = time.time()
+        for key, deadline in snapshot["deadlines"].items():
+            self._set_deadline(key, deadline - wall)
+        self.reap()
+        self._evict(0, 0)
+
+    def _timed(self, op, method, *args):
+        """ Call method and record its latency under op
+        """
+        start = time.perf_counter_ns()
+        result = method(*args)
+        elapsed = time.perf_counter_ns() - start
+        with self.lock:
+            self.stats.record(op, elapsed)
+        return result
+
+    def _put(self, key, item, ttl):
+        """ Add an item in the cache
+        """
+        if key is None or item is None:
+            return
+        size = 0 if self.max_bytes is None else self.sizer(item)
+        if ttl is None:
+            ttl = self.ttl
+        with self.lock:
+            if self.admission is not None:
+                self.admission.record(key)
+            if self.max_bytes is not None and size > self.max_bytes:
+                if key in self.cache_data:
+                    self._remove(key)
+                return
+            if key in self.cache_data:
+                self._update(key, item, size, ttl)
+                self._evict(0, 0)
+                return
+            if self.admission is not None and not self._admits(key, 1, size):
+                return
+            self._evict(1, size)
+            self._insert(key, item, size, ttl)
+
+    def _get(self, key):
+        """ Get an item by key
+        """
+        if key is None:
+            return None
+        with self.lock:
+            if self.admission is not None:
+                self.admission.record(key)
+            item = self.cache_data.get(key)
+            if item is None or self._expired(key):
+                if self.stats is not None:
+                    self.stats.misses += 1
+                return None
+            self._on_access(key)
+            if self.stats is not None:
+                self.stats.hits += 1
+            return item
+
+    def _put_many(self, items, ttl):
+        """ Add many items in the cache in one eviction pass
+        """
+        if hasattr(items, "items"):
+            items = items.items()
+        batch = {key: item for key, item in items
+                 if key is not None and item is not None}
+        if ttl is None:
+            ttl = self.ttl
+        sizes = {}
+        if self.max_bytes is not None:
+            sizes = {key: self.sizer(item) for key, item in batch.items()}
+        with self.lock:
+            if self.admission is not None:
+                for key in batch:
+                    self.admission.record(key)
+            new = []
+            for key, item in batch.items():
+                size = sizes.get(key, 0)
+                if self.max_bytes is not None and size > self.max_bytes:
+                    if key in self.cache_data:
+                        self._remove(key)
+                elif key in self.cache_data:
+                    self._update(key, item, size, ttl)
+                else:
+                    new.append((key, item, size))
+            if self.max_items is not None and len(new) > self.max_items:
+                new = new[len(new) - self.max_items:]
+            if self.max_bytes is not None:
+                fits = 0
+                budget = self.max_bytes
+                for _, _, size in reversed(new):
+                    if size > budget:
+                        break
+                    budget -= size
+                    fits += 1
+                new = new[len(new) - fits:]
+            if self.admission is not None:
+                count = len(new)
+                need = sum(size for _, _, size in new)
+                new = [entry for entry in new
+                       if self._admits(entry[0], count, need)]
+            self._evict(len(new), sum(size for _, _, size in new))
+            for key, item, size in new:
+                self._insert(key, item, size, ttl)
+
+    def _get_many(self, keys):
+        """ Get the items of many keys at once
+        """
+        found = {}
+        misses = 0
+        lookup = self.cache_data.get
+        on_access = self._on_access
+        with self.lock:
+            for key in keys:
+                if self.admission is not None:
+                    self.admission.record(key)
+                item = lookup(key)
+                if item is None or (self.deadlines and self._expired(key)):
+                    misses += 1
+                    continue
+                on_access(key)
+                found[key] = item
+            if self.stats is not None:
+                self.stats.hits += len(found)
+                self.stats.misses += misses
+        return found
+
+    def _delete_many(self, keys):
+        """ Remove many keys from the cache
+        """
+        deleted = 0
+        with self.lock:
+            for key in keys:
+                if key in self.cache_data:
+                    self._remove(key)
+                    deleted += 1
+            if self.stats is not None:
+                self.stats.deletes += deleted
+        return deleted
+
+    def reap(self, limit=None):
+        """ Remove up to `limit` expired items (all of them by default)
+
+        Returns:
+            int: The number of items removed.
+        """
+        reaped = 0
+        now = time.monotonic()
+        with self.lock:
+            heap = self.expiry_heap
+            while heap and heap[0][0] <= now and (limit is None or
+                                                  reaped < limit):
+                deadline, _, key = heapq.heappop(heap)
+                # Skip entries left behind by a later put or a removal
+                if self.deadlines.get(key) == deadline:
+                    self._remove(key)
+                    reaped += 1
+            if self.stats is not None:
+                self.stats.expirations += reaped
+            if len(heap) > 2 * len(self.deadlines) + 64:
+                self.expiry_heap = [(deadline, next(self.expiry_seq), key)
+                                    for key, deadline
+                                    in self.deadlines.items()]
+                heapq.heapify(self.expiry_heap)
+        return reaped
+
+    def start_reaper(self, interval=1.0, batch=1000):
+        """ Start a daemon thread that calls reap every `interval`
+        seconds, releasing the lock after every `batch` items
+        """
+        if self.reaper is not None:
+            return
+        stop = threading.Event()
+
+        def run():
+            """ Reap expired items until stop_reaper is called
+            """
+            while not stop.wait(interval):
+                while self.reap(batch) == batch:
+                    pass
+
+        self.reaper = (threading.Thread(target=run, daemon=True), stop)
+        self.reaper[0].start()
+
+    def stop_reaper(self):
+        """ Stop the background reaper thread, if any
+        """
+        if self.reaper is not None:
+            thread, stop = self.reaper
+            stop.set()
+            thread.join()
+            self.reaper = None
+
+    def _evict(self, count, size):
+        """ Remove expired items, then discard policy victims, until
+        `count` more items of `size` bytes in total fit in the cache
+        """
+        while self.cache_data and self._is_over(count, size):
+            if not self.reap(1):
+                self._discard(self._victim())
+
+    def _is_over(self, count, size):
+        """ Tell whether `count` more items of `size` bytes would exceed
+        the capacity
+        """
+        if (self.max_items is not None and
+                len(self.cache_data) + count > self.max_items):
+            return True
+        return (self.max_bytes is not None and
+                self.nbytes + size > self.max_bytes)
+
+    def _admits(self, key, count, size):
+        """ Ask the admission filter whether key may be cached, when
+        `count` new items of `size` bytes would need an eviction
+        """
+        if not self.cache_data or not self._is_over(count, size):
+            return True
+        if self.admission.admit(key, self._victim()):
+            return True
+        if self.stats is not None:
+            self.stats.rejections += 1
+        return False
+
+    def _insert(self, key, item, size, ttl):
+        """ Store an item under a new key
+        """
+        self.cache_data[key] = item
+        self._on_insert(key)
+        self._set_deadline(key, ttl)
+        if self.max_bytes is not None:
+            self.sizes[key] = size
+            self.nbytes += size
+        if self.stats is not None:
+            self.stats.inserts += 1
+
+    def _update(self, key, item, size, ttl):
+        """ Store an item under an existing key
+        """
+        self.cache_data[key] = item
+        self._on_update(key)
+        self._set_deadline(key, ttl)
+        if self.max_bytes is not None:
+            self.nbytes += size - self.sizes[key]
+            self.sizes[key] = size
+        if self.stats is not None:
+            self.stats.updates += 1
+
+    def _expired(self, key):
+        """ Remove key if its deadline has passed
+
+        Returns:
+            bool: True if key was expired.
+        """
+        if not self.deadlines:
+            return False
+        deadline = self.deadlines.get(key)
+        if deadline is None or deadline > time.monotonic():
+            return False
+        self._remove(key)
+        if self.stats is not None:
+            self.stats.expirations += 1
+        return True
+
+    def _discard(self, key):
+        """ Evict key from the cache and report it to on_evict
+        """
+        item = self._remove(key, evicted=True)
+        if self.stats is not None:
+            self.stats.evictions += 1
+        if self.on_evict is not None:
+            self.on_evict(key, item)
+
+    def _remove(self, key, evicted=False):
+        """ Remove key from the cache and from the policy state, evicted
+        being True when the policy chose to discard it
+        """
+        self._on_remove(key, evicted)
+        item = self.cache_data.pop(key)
+        if self.max_bytes is not None:
+            self.nbytes -= self.sizes.pop(key)
+        self.deadlines.pop(key, None)
+        return item
+
+    def _set_deadline(self, key, ttl):
+        """ Make key expire in ttl seconds, or never if ttl is None
+        """
+        if ttl is None:
+            self.deadlines.pop(key, None)
+            return
+        deadline = time.monotonic() + ttl
+        self.deadlines[key] = deadline
+        heapq.heappush(self.expiry_heap,
+                       (deadline, next(self.expiry_seq), key))
+
+    def _on_insert(self, key):
+        """ Record a new key, already stored in cache_data
+        """
+
+    def _on_access(self, key):
+        """ Record a cache hit on key
+        """
+
+    def _on_update(self, key):
+        """ Record a new item put under an existing key
+        """
+        self._on_access(key)
+
+    def _on_remove(self, key, evicted=False):
+        """ Forget the policy state of a key about to leave cache_data,
+        because it was evicted or because it was deleted, expired or
+        replaced by an item too big to cache
+        """
+
+    def _victim(self):
+        """ Return the key the policy would discard next
+        """
         raise NotImplementedError(
-            "get must be implemented in your cache class")
+            "_victim must be implemented in your cache class")
+
+
+class ConcurrentCache():
+    """ ConcurrentCache spreads keys over independent shards of one cache
+    class. Each shard has its own lock, so threads working on keys of
+    different shards never contend. Eviction is decided per shard, which
+    approximates the policy over the whole cache.
+    """
+
+    def __init__(self, policy, shards=16, max_items=None, max_bytes=None,
+                 **kwargs):
+        """ Initialize the shards, splitting the capacity between them.
+        Other keyword arguments are passed to every shard.
+
+        Each shard gets max_items / shards items, rounded up, so the
+        whole cache holds at most shards - 1 items more than max_items;
+        the same goes for max_bytes. Every shard must hold one item, so
+        shards may not exceed max_items.
+        """
+        if max_items is None and max_bytes is None:
+            max_items = policy.MAX_ITEMS
+        if max_items is not None and shards > max_items:
+            raise ValueError("{} shards for {} items: every shard must "
+                             "hold an item".format(shards, max_items))
+        if max_items is not None:
+            max_items = max(1, -(-max_items // shards))
+        if max_bytes is not None:
+            max_bytes = max(1, -(-max_bytes // shards))
+        self.shards = [policy(max_items=max_items, max_bytes=max_bytes,
+                              **kwargs)
+                       for _ in range(shards)]
+        self.reaper = None
+
+    @property
+    def on_evict(self):
+        """ Eviction callback of the shards
+        """
+        return self.shards[0].on_evict
+
+    @on_evict.setter
+    def on_evict(self, on_evict):
+        """ Set the eviction callback of every shard
+        """
+        for shard in self.shards:
+            shard.on_evict = on_evict
+
+    @property
+    def ttl(self):
+        """ Default time-to-live of the shards
+        """
+        return self.shards[0].ttl
+
+    @ttl.setter
+    def ttl(self, ttl):
+        """ Set the default time-to-live of every shard
+        """
+        for shard in self.shards:
+            shard.ttl = ttl
+
+    def shard(self, key):
+        """ Return the shard owning key
+        """
+        return self.shards[hash(key) % len(self.shards)]
+
+    @property
+    def cache_data(self):
+        """ Merged copy of the data of every shard
+        """
+        data = {}
+        for shard in self.shards:
+            with shard.lock:
+                data.update(shard.cache_data)
+        return data
+
+    def print_cache(self):
+        """ Print the cache, merging the shards only once
+        """
+        data = self.cache_data
+        print("Current cache:")
+        for key in sorted(data.keys()):
+            print("{}: {}".format(key, data.get(key)))
+
+    def put(self, key, item, ttl=None):
+        """ Add an item in the shard owning key
+        """
+        self.shard(key).put(key, item, ttl)
+
+    def get(self, key):
+        """ Get an item by key from the shard owning it
+        """
+        return self.shard(key).get(key)
+
+    def put_many(self, items, ttl=None):
+        """ Add many items, with one put_many per shard
+        """
+        if hasattr(items, "items"):
+            items = items.items()
+        batches = self._split(items, lambda pair: pair[0])
+        for shard, batch in batches.items():
+            shard.put_many(batch, ttl)
+
+    def get_many(self, keys):
+        """ Get the items of many keys, with one get_many per shard
+        """
+        found = {}
+        for shard, batch in self._split(keys, lambda key: key).items():
+            found.update(shard.get_many(batch))
+        return found
+
+    def delete_many(self, keys):
+        """ Remove many keys, with one delete_many per shard
+        """
+        deleted = 0
+        for shard, batch in self._split(keys, lambda key: key).items():
+            deleted += shard.delete_many(batch)
+        return deleted
+
+    def stats_snapshot(self):
+        """ Return the statistics of all the shards added together, or
+        None when the shards were created without stats=True
+        """
+        if self.shards[0].stats is None:
+            return None
+        total = CacheStats()
+        for shard in self.shards:
+            with shard.lock:
+                total.merge(shard.stats)
+        return total.snapshot()
+
+    def dump(self, path):
+        """ Save every shard in one snapshot file
+        """
+        snapshots = []
+        for shard in self.shards:
+            with shard.lock:
+                snapshots.append(shard._snapshot())
+        write_snapshot(path, {"shards": snapshots})
+
+    def load(self, path):
+        """ Restore every shard from a snapshot saved by dump, with the
+        same number of shards.
+
+        The hash of str keys changes between processes unless
+        PYTHONHASHSEED is set, so keys restored in a shard that no longer
+        owns them are moved to their new shard, where their policy state
+        starts over.
+        """
+        snapshots = read_snapshot(path).get("shards")
+        if snapshots is None or len(snapshots) != len(self.shards):
+            raise ValueError("{} is not a snapshot of {} shards".format(
+                path, len(self.shards)))
+        moved = []
+        for shard, snapshot in zip(self.shards, snapshots):
+            with shard.lock:
+                shard._restore(snapshot)
+                now = time.monotonic()
+                for key in list(shard.cache_data):
+                    if self.shard(key) is shard:
+                        continue
+                    deadline = shard.deadlines.get(key)
+                    ttl = None if deadline is None else deadline - now
+                    moved.append((key, shard._remove(key), ttl))
+        for key, item, ttl in moved:
+            self.put(key, item, ttl)
+
+    def _split(self, entries, key_of):
+        """ Group entries by the shard owning their key
+        """
+        batches = {}
+        for entry in entries:
+            shard = self.shards[hash(key_of(entry)) % len(self.shards)]
+            batches.setdefault(shard, []).append(entry)
+        return batches
+
+    def reap(self, limit=None):
+        """ Remove up to `limit` expired items, one shard at a time
+        """
+        reaped = 0
+        for shard in self.shards:
+            if limit is None:
+                reaped += shard.reap()
+            elif reaped < limit:
+                reaped += shard.reap(limit - reaped)
+        return reaped
+
+    def start_reaper(self, interval=1.0, batch=1000):
+        """ Start one background reaper thread for all the shards
+        """
+        BaseCaching.start_reaper(self, interval, batch)
+
+    def stop_reaper(self):
+        """ Stop the background reaper thread, if any
+        """
+        BaseCaching.stop_reaper(self)
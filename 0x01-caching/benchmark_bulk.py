@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+benchmark_bulk.py
+Compare put_many/get_many with looping over put/get.
+
+Each round writes then reads a batch of keys, half of them new, into a
+full cache, so that every batch also triggers evictions.
+
+Usage: ./benchmark_bulk.py [rounds]
+"""
+
+import sys
+import time
+
+LRUCache = __import__('3-lru_cache').LRUCache
+MRUCache = __import__('4-mru_cache').MRUCache
+LFUCache = __import__('100-lfu_cache').LFUCache
+
+POLICIES = [LRUCache, MRUCache, LFUCache]
+BATCH_SIZES = [1, 10, 50, 200]
+CAPACITY = 10000
+
+
+def bench_loop(cache, batches):
+    """
+    Write and read every batch one key at a time.
+
+    Returns:
+        float: The elapsed time, in seconds.
+    """
+    start = time.perf_counter()
+    for batch in batches:
+        for key in batch:
+            cache.put(key, key)
+        for key in batch:
+            cache.get(key)
+    return time.perf_counter() - start
+
+
+def bench_bulk(cache, batches):
+    """
+    Write and read every batch with put_many/get_many.
+
+    Returns:
+        float: The elapsed time, in seconds.
+    """
+    start = time.perf_counter()
+    for batch in batches:
+        cache.put_many((key, key) for key in batch)
+        cache.get_many(batch)
+    return time.perf_counter() - start
+
+
+def make_batches(rounds, size):
+    """
+    Build `rounds` batches of `size` keys, half reused and half new.
+    """
+    batches = []
+    fresh = CAPACITY
+    for i in range(rounds):
+        half = size // 2
+        reused = [(i * size + j) % CAPACITY for j in range(size - half)]
+        batches.append(reused + list(range(fresh, fresh + half)))
+        fresh += half
+    return batches
+
+
+def main():
+    """
+    Print the speedup of the bulk API per policy and batch size.
+    """
+    keys = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    rows = []
+    for policy in POLICIES:
+        for size in BATCH_SIZES:
+            batches = make_batches(keys // size, size)
+            timings = []
+            for bench in (bench_loop, bench_bulk):
+                cache = policy(max_items=CAPACITY, on_evict=None)
+                cache.put_many((key, key) for key in range(CAPACITY))
+                timings.append(bench(cache, batches))
+            rows.append((policy.__name__, size, keys / timings[0],
+                         keys / timings[1]))
+
+    print("{:>10} {:>6} {:>12} {:>12} {:>8}".format(
+        "policy", "batch", "loop keys/s", "bulk keys/s", "speedup"))
+    for name, size, loop, bulk in rows:
+        print("{:>10} {:>6} {:>12.0f} {:>12.0f} {:>7.2f}x".format(
+            name, size, loop, bulk, bulk / loop))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+benchmark_concurrent.py
+Stress and throughput check for caches shared between threads.
+
+Every cache class is hammered by several threads doing random put/get,
+then checked for consistency: no more than max_items items per shard and
+policy metadata that still matches cache_data. Then the throughput of a
+single locked LRUCache and of a lock-striped LRUCache.concurrent(), both
+of 100 items, is reported for 1 to 8 threads.
+
+Usage: ./benchmark_concurrent.py [ops_per_thread]
+"""
+
+import random
+import sys
+import threading
+import time
+
+BasicCache = __import__('0-basic_cache').BasicCache
+FIFOCache = __import__('1-fifo_cache').FIFOCache
+LIFOCache = __import__('2-lifo_cache').LIFOCache
+LRUCache = __import__('3-lru_cache').LRUCache
+MRUCache = __import__('4-mru_cache').MRUCache
+LFUCache = __import__('100-lfu_cache').LFUCache
+
+POLICIES = [BasicCache, FIFOCache, LIFOCache, LRUCache, MRUCache, LFUCache]
+THREADS = [1, 2, 4, 8]
+KEYS = 1000
+
+
+def worker(cache, ops, seed):
+    """
+    Run `ops` random put/get operations on cache.
+    """
+    rng = random.Random(seed)
+    for _ in range(ops):
+        key = rng.randrange(KEYS)
+        if rng.random() < 0.5:
+            cache.put(key, key)
+        else:
+            item = cache.get(key)
+            assert item is None or item == key
+
+
+def run(cache, threads, ops):
+    """
+    Run `threads` workers on cache.
+
+    Returns:
+        float: The wall clock time, in seconds.
+    """
+    pool = [threading.Thread(target=worker, args=(cache, ops, seed))
+            for seed in range(threads)]
+    start = time.perf_counter()
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def check(shard):
+    """
+    Assert that a cache instance is still consistent.
+    """
+    if shard.max_items is not None:
+        assert len(shard.cache_data) <= shard.max_items
+    if isinstance(shard, LFUCache):
+        assert shard.buckets.slots.keys() == shard.cache_data.keys()
+        assert sum(shard.buckets.sizes.values()) == len(shard.cache_data)
+
+
+def main():
+    """
+    Run the stress test, then the throughput benchmark.
+    """
+    ops = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    rows = []
+    for policy in POLICIES:
+        limit = None if policy.MAX_ITEMS is None else 100
+        cache = policy(max_items=limit, on_evict=None)
+        run(cache, 8, ops)
+        check(cache)
+        striped = policy.concurrent(shards=8, max_items=limit,
+                                    on_evict=None)
+        run(striped, 8, ops)
+        for shard in striped.shards:
+            check(shard)
+
+    for threads in THREADS:
+        locked = LRUCache(max_items=100, on_evict=None)
+        striped = LRUCache.concurrent(shards=16, max_items=100,
+                                      on_evict=None)
+        rows.append((threads,
+                     threads * ops / run(locked, threads, ops),
+                     threads * ops / run(striped, threads, ops)))
+
+    print("stress: {} policies consistent".format(len(POLICIES)))
+    print("{:>8} {:>14} {:>14}".format("threads", "locked ops/s",
+                                       "striped ops/s"))
+    for threads, locked, striped in rows:
+        print("{:>8} {:>14.0f} {:>14.0f}".format(threads, locked, striped))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+benchmark_lru.py
+Measure the per-operation cost of LRUCache as its capacity grows.
+
+Each capacity is filled first, then a steady-state mix of hits, misses
+and evictions is timed. With an O(1) engine the ns/op column stays flat
+from 4 to 1M items.
+
+Usage: ./benchmark_lru.py [ops_per_capacity]
+"""
+
+import random
+import sys
+import time
+
+LRUCache = __import__('3-lru_cache').LRUCache
+
+CAPACITIES = [4, 100, 10000, 100000, 1000000]
+
+
+def bench(capacity, ops):
+    """
+    Time `ops` mixed get/put operations on a full cache of `capacity`.
+
+    Returns:
+        float: The average cost of one operation, in nanoseconds.
+    """
+    cache = LRUCache(max_items=capacity, on_evict=None)
+    for key in range(capacity):
+        cache.put(key, key)
+
+    rng = random.Random(capacity)
+    keys = [rng.randrange(capacity * 2) for _ in range(ops)]
+
+    start = time.perf_counter()
+    for key in keys:
+        if cache.get(key) is None:
+            cache.put(key, key)
+    elapsed = time.perf_counter() - start
+    return elapsed / ops * 1e9
+
+
+def main():
+    """
+    Run the benchmark for every capacity and print a table.
+    """
+    ops = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    results = []
+    for capacity in CAPACITIES:
+        results.append((capacity, bench(capacity, ops)))
+
+    print("{:>10} {:>10}".format("capacity", "ns/op"))
+    for capacity, ns_per_op in results:
+        print("{:>10} {:>10.1f}".format(capacity, ns_per_op))
+
+
+if __name__ == "__main__":
+    main()
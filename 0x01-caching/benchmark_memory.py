@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+benchmark_memory.py
+Measure the memory each cache policy spends per entry.
+
+Every policy is filled with the same int keys and items, which are
+allocated before measuring, then a third of the keys are read so that
+policies with several lists spread keys over them. What is left is the
+cost of cache_data plus the policy metadata.
+
+Usage: ./benchmark_memory.py [entries]
+"""
+
+import gc
+import sys
+import tracemalloc
+
+BasicCache = __import__('0-basic_cache').BasicCache
+FIFOCache = __import__('1-fifo_cache').FIFOCache
+LIFOCache = __import__('2-lifo_cache').LIFOCache
+LRUCache = __import__('3-lru_cache').LRUCache
+MRUCache = __import__('4-mru_cache').MRUCache
+LFUCache = __import__('100-lfu_cache').LFUCache
+TwoQueueCache = __import__('101-two_queue_cache').TwoQueueCache
+
+POLICIES = [BasicCache, FIFOCache, LIFOCache, LRUCache, MRUCache, LFUCache,
+            TwoQueueCache]
+
+
+def bytes_per_entry(policy, keys):
+    """
+    Fill a cache of the policy with keys.
+
+    Returns:
+        float: The memory allocated by the cache, per entry.
+    """
+    gc.collect()
+    tracemalloc.start()
+    limit = None if policy.MAX_ITEMS is None else len(keys)
+    cache = policy(max_items=limit, on_evict=None)
+    cache.put_many((key, key) for key in keys)
+    cache.get_many(keys[::3])
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del cache
+    return allocated / len(keys)
+
+
+def main():
+    """
+    Print the bytes per entry of every policy.
+    """
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    keys = list(range(entries))
+    print("{:>14} {:>14}".format("policy", "bytes/entry"))
+    for policy in POLICIES:
+        print("{:>14} {:>14.1f}".format(policy.__name__,
+                                        bytes_per_entry(policy, keys)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+benchmark_policies.py
+Replay key traces against every cache policy at several capacities and
+report hit ratio, throughput and peak memory.
+
+Synthetic traces:
+  - uniform: every key is equally likely
+  - zipf: skewed popularity, a few keys get most of the requests
+  - scan: the zipf requests, interrupted by long sequential scans of
+    keys that are never requested again, like a full export going
+    through Server.get_page
+  - loop: the same sequence of keys requested over and over
+
+Recorded traces are text files with one key per line, given with
+--trace-file. Each request is a get, followed by a put on a miss.
+Policies marked "+TinyLFU" are fronted by a TinyLFU admission filter.
+
+Usage: ./benchmark_policies.py [--requests N] [--capacities 100,500]
+           [--trace zipf] [--trace-file keys.txt] [--format json]
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+FIFOCache = __import__('1-fifo_cache').FIFOCache
+LIFOCache = __import__('2-lifo_cache').LIFOCache
+LRUCache = __import__('3-lru_cache').LRUCache
+MRUCache = __import__('4-mru_cache').MRUCache
+LFUCache = __import__('100-lfu_cache').LFUCache
+TwoQueueCache = __import__('101-two_queue_cache').TwoQueueCache
+TinyLFU = __import__('tinylfu').TinyLFU
+
+CLASSES = [FIFOCache, LIFOCache, LRUCache, MRUCache, LFUCache,
+           TwoQueueCache]
+POLICIES = [(cls.__name__, cls, False) for cls in CLASSES] + [
+    ("LRUCache+TinyLFU", LRUCache, True),
+    ("TwoQueueCache+TinyLFU", TwoQueueCache, True),
+]
+KEYS = 10000
+CAPACITIES = [100, 500, 2000]
+FIELDS = ["policy", "trace", "capacity", "requests", "hit_ratio",
+          "ops_per_sec", "peak_bytes"]
+
+
+def uniform_trace(length, keys=KEYS, seed=0):
+    """
+    Build a trace where every key is equally likely.
+    """
+    rng = random.Random(seed)
+    return [rng.randrange(keys) for _ in range(length)]
+
+
+def zipf_trace(length, keys=KEYS, alpha=0.9, seed=0):
+    """
+    Build a trace where the key of rank i is requested with a
+    probability proportional to 1 / i**alpha.
+    """
+    rng = random.Random(seed)
+    weights = list(itertools.accumulate(1 / (rank ** alpha)
+                                        for rank in range(1, keys + 1)))
+    return rng.choices(range(keys), cum_weights=weights, k=length)
+
+
+def scan_trace(length, keys=KEYS, scan_every=None, scan_length=None,
+               seed=0):
+    """
+    Build a zipf trace with a scan of `scan_length` new keys inserted
+    every `scan_every` requests. By default a scan comes every 5000
+    requests, or 4 times in a shorter trace, and is 2/5 as long as the
+    requests between two scans.
+    """
+    if scan_every is None:
+        scan_every = max(1, min(5000, length // 4))
+    if scan_length is None:
+        scan_length = max(1, scan_every * 2 // 5)
+    trace = []
+    cold = keys
+    for start in range(0, length, scan_every):
+        trace.extend(zipf_trace(scan_every, keys, seed=seed + start))
+        trace.extend(range(cold, cold + scan_length))
+        cold += scan_length
+    return trace[:length]
+
+
+def loop_trace(length, loop_length=1000):
+    """
+    Build a trace going through the keys 0 to `loop_length` - 1 in
+    order, again and again.
+    """
+    return [i % loop_length for i in range(length)]
+
+
+TRACES = {"uniform": uniform_trace, "zipf": zipf_trace,
+          "scan": scan_trace, "loop": loop_trace}
+
+
+def read_trace(path, length=None):
+    """
+    Read a recorded trace, one key per line.
+    """
+    with open(path) as f:
+        keys = (line.rstrip("\n") for line in f)
+        return list(itertools.islice(keys, length))
+
+
+def replay(policy, tinylfu, trace, capacity):
+    """
+    Replay a trace on a new cache, with a TinyLFU filter if `tinylfu`.
+
+    Returns:
+        int: The number of requests that were hits.
+    """
+    admission = TinyLFU(capacity) if tinylfu else None
+    cache = policy(max_items=capacity, on_evict=None, admission=admission)
+    get, put = cache.get, cache.put
+    hits = 0
+    for key in trace:
+        if get(key) is None:
+            put(key, key)
+        else:
+            hits += 1
+    return hits
+
+
+def measure(name, policy, tinylfu, trace_name, trace, capacity, memory):
+    """
+    Replay a trace once for time, and once more under tracemalloc for
+    the peak memory when `memory` is set.
+
+    Returns:
+        dict: One result row, with the FIELDS keys.
+    """
+    start = time.perf_counter()
+    hits = replay(policy, tinylfu, trace, capacity)
+    elapsed = time.perf_counter() - start
+    peak = None
+    if memory:
+        tracemalloc.start()
+        replay(policy, tinylfu, trace, capacity)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return {"policy": name, "trace": trace_name, "capacity": capacity,
+            "requests": len(trace), "hit_ratio": round(hits / len(trace), 4),
+            "ops_per_sec": round(len(trace) / elapsed), "peak_bytes": peak}
+
+
+def parse_args(argv):
+    """
+    Parse the command line.
+    """
+    parser = argparse.ArgumentParser(
+        description="Replay key traces against every cache policy at "
+        "several capacities and report hit ratio, throughput and peak "
+        "memory.")
+    parser.add_argument("--requests", type=int, default=50000,
+                        help="length of the synthetic traces")
+    parser.add_argument("--capacities", default=",".join(
+        str(capacity) for capacity in CAPACITIES),
+        help="comma separated cache sizes, in items")
+    parser.add_argument("--trace", action="append", choices=sorted(TRACES),
+                        help="synthetic trace to replay, repeatable "
+                        "(all of them by default)")
+    parser.add_argument("--trace-file", action="append", default=[],
+                        help="recorded trace to replay, repeatable")
+    parser.add_argument("--policy", action="append",
+                        help="policy to run, repeatable (all by default)")
+    parser.add_argument("--format", choices=["table", "json", "csv"],
+                        default="table",
+                        help="json writes one JSON object per line")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="skip the tracemalloc run")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """
+    Run every policy on every trace and capacity and print the results.
+    """
+    args = parse_args(argv)
+    traces = []
+    if args.trace or not args.trace_file:
+        for name in args.trace or sorted(TRACES):
+            traces.append((name, TRACES[name](args.requests)))
+    for path in args.trace_file:
+        traces.append((path, read_trace(path)))
+    capacities = [int(c) for c in args.capacities.split(",")]
+    policies = [p for p in POLICIES
+                if not args.policy or p[0] in args.policy]
+
+    if args.format == "csv":
+        writer = csv.DictWriter(sys.stdout, FIELDS)
+        writer.writeheader()
+    elif args.format == "table":
+        print("{:>22} {:>10} {:>9} {:>9} {:>11} {:>11}".format(
+            "policy", "trace", "capacity", "hit ratio", "ops/s",
+            "peak bytes"))
+    for trace_name, trace in traces:
+        for capacity in capacities:
+            for name, policy, tinylfu in policies:
+                row = measure(name, policy, tinylfu, trace_name, trace,
+                              capacity, not args.no_memory)
+                if args.format == "json":
+                    print(json.dumps(row), flush=True)
+                elif args.format == "csv":
+                    writer.writerow(row)
+                else:
+                    print("{:>22} {:>10} {:>9} {:>9.3f} {:>11} {:>11}"
+                          .format(name, trace_name, capacity,
+                                  row["hit_ratio"], row["ops_per_sec"],
+                                  row["peak_bytes"] or "-"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+cache_stats.py
+This module provides the CacheStats class that counts what happens in a
+cache and keeps latency histograms of its operations.
+"""
+
+
+class CacheStats():
+    """
+    CacheStats holds the counters of one cache and, for each operation
+    name, a histogram of its latencies in power-of-two nanosecond buckets:
+    bucket i counts the calls that took from 2**(i-1) to 2**i - 1 ns.
+    """
+    COUNTERS = ("hits", "misses", "inserts", "updates", "evictions",
+                "expirations", "deletes", "rejections")
+    PERCENTILES = (50, 90, 99)
+
+    def __init__(self):
+        """
+        Initialize every counter and histogram to zero.
+        """
+        for name in self.COUNTERS:
+            setattr(self, name, 0)
+        self.latency = {}
+        self.total_ns = {}
+
+    def record(self, op, elapsed_ns):
+        """
+        Add one call of an operation to its latency histogram.
+
+        Args:
+            op (str): The operation name, such as "get" or "put".
+            elapsed_ns (int): How long the call took, in nanoseconds.
+        """
+        histogram = self.latency.get(op)
+        if histogram is None:
+            histogram = self.latency[op] = [0] * 65
+            self.total_ns[op] = 0
+        histogram[min(elapsed_ns.bit_length(), 64)] += 1
+        self.total_ns[op] += elapsed_ns
+
+    def merge(self, other):
+        """
+        Add the counters and histograms of another CacheStats to these.
+
+        Args:
+            other (CacheStats): The statistics to add.
+        """
+        for name in self.COUNTERS:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        for op, histogram in other.latency.items():
+            mine = self.latency.setdefault(op, [0] * 65)
+            for i, count in enumerate(histogram):
+                mine[i] += count
+            self.total_ns[op] = self.total_ns.get(op, 0) + other.total_ns[op]
+
+    def snapshot(self):
+        """
+        Return a copy of the statistics as plain data.
+
+        Latencies are summarized per operation by their count, mean and
+        percentiles; a percentile is the upper bound of the histogram
+        bucket it falls in.
+
+        Returns:
+            dict: The counters, the hit ratio and the latency summaries.
+        """
+        data = {name: getattr(self, name) for name in self.COUNTERS}
+        lookups = self.hits + self.misses
+        data["hit_ratio"] = self.hits / lookups if lookups else 0.0
+        data["latency_ns"] = {}
+        for op, histogram in self.latency.items():
+            count = sum(histogram)
+            summary = {"count": count,
+                       "mean": self.total_ns[op] / count if count else 0.0}
+            for percentile in self.PERCENTILES:
+                rank = count * percentile / 100
+                seen = 0
+                for i, bucket in enumerate(histogram):
+                    seen += bucket
+                    if seen >= rank:
+                        break
+                summary["p{}".format(percentile)] = 2 ** i - 1
+            data["latency_ns"][op] = summary
+        return data
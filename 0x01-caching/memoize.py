@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+memoize.py
+This module provides the memoize decorator, which caches the results of
+a function in any BaseCaching policy.
+"""
+
+import functools
+import threading
+from concurrent.futures import Future
+
+LRUCache = __import__('3-lru_cache').LRUCache
+
+
+class NoneResult():
+    """
+    The type of NONE, which stands for a None result, as the caches never
+    store None. It pickles as a reference to NONE, so a result restored
+    by BaseCaching.load or read from a TieredCache L2 is still NONE.
+    """
+
+    def __reduce__(self):
+        """
+        Pickle as the module level NONE.
+        """
+        return "NONE"
+
+    def __repr__(self):
+        """
+        Name the sentinel.
+        """
+        return "NONE"
+
+
+NONE = NoneResult()
+
+
+def make_key(func, args, kwargs):
+    """
+    Build the cache key of a call from the function and its arguments.
+
+    Args:
+        func (callable): The memoized function.
+        args (tuple): The positional arguments of the call.
+        kwargs (dict): The keyword arguments of the call.
+
+    Returns:
+        tuple: A key that is hashable if all the arguments are.
+    """
+    key = (func.__module__, func.__qualname__) + args
+    if kwargs:
+        key += (NONE,) + tuple(sorted(kwargs.items()))
+    return key
+
+
+def memoize(cache=None, ttl=None, key=make_key):
+    """
+    Cache the results of the decorated function.
+
+    Concurrent calls that miss on the same key are coalesced: the first
+    one computes the result while the others wait for it, so each missing
+    key is computed only once. An exception is raised to every waiting
+    caller and is not cached. Calls with unhashable arguments bypass the
+    cache.
+
+    Args:
+        cache (BaseCaching): The store of the results, an LRUCache of 128
+            items by default. It can be shared by several functions.
+        ttl (float): How long results stay valid, in seconds. The
+            default ttl of the cache applies when None.
+        key (callable): Builds the key of a call from (func, args,
+            kwargs).
+
+    Returns:
+        callable: The decorator. The decorated function exposes its store
+            as its `cache` attribute.
+    """
+    def decorator(func):
+        """
+        Wrap func with the cache.
+        """
+        store = cache
+        if store is None:
+            store = LRUCache(max_items=128, on_evict=None)
+        in_flight = {}
+        lock = threading.Lock()
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            """
+            Return the cached result of the call, computing it once.
+            """
+            try:
+                call_key = key(func, args, kwargs)
+                hash(call_key)
+            except TypeError:
+                return func(*args, **kwargs)
+
+            item = store.get(call_key)
+            if item is not None:
+                return None if item is NONE else item
+
+            with lock:
+                future = in_flight.get(call_key)
+                if future is None:
+                    # A leader may have stored the result and left since
+                    # the first lookup
+                    item = store.get(call_key)
+                    if item is not None:
+                        return None if item is NONE else item
+                leader = future is None
+                if leader:
+                    future = in_flight[call_key] = Future()
+            if not leader:
+                return future.result()
+
+            try:
+                result = func(*args, **kwargs)
+                store.put(call_key, NONE if result is None else result, ttl)
+                future.set_result(result)
+                return result
+            except BaseException as exc:
+                future.set_exception(exc)
+                raise
+            finally:
+                with lock:
+                    del in_flight[call_key]
+
+        wrapper.cache = store
+        return wrapper
+    return decorator
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+slot_lists.py
+This module provides the SlotLists class, a compact store of the policy
+metadata of the caches: keys kept in several ordered lists.
+"""
+
+from array import array
+
+
+class SlotLists():
+    """
+    SlotLists keeps keys in doubly-linked lists identified by an integer
+    list id (a frequency for LFUCache, a queue for TwoQueueCache).
+
+    Instead of one object or one OrderedDict entry per key, each key gets
+    a slot number and the links live in typed arrays indexed by slot:
+    prev and next (4 bytes each), owner, the list id of the slot (4
+    bytes), and keys, the key of the slot. Freed slots are chained
+    through next and reused. Appending, moving, removing and reading the
+    first key of a list are all O(1).
+    """
+    MAX_LIST_ID = 2 ** 32 - 1
+
+    def __init__(self):
+        """
+        Initialize empty lists.
+        """
+        self.slots = {}
+        self.keys = []
+        self.prev = array('i')
+        self.next = array('i')
+        self.owner = array('I')
+        self.heads = {}
+        self.tails = {}
+        self.sizes = {}
+        self.free = -1
+
+    def __contains__(self, key):
+        """
+        Tell whether key is in one of the lists.
+        """
+        return key in self.slots
+
+    def __len__(self):
+        """
+        Return the number of keys in all the lists.
+        """
+        return len(self.slots)
+
+    def size(self, list_id):
+        """
+        Return the number of keys in a list.
+        """
+        return self.sizes.get(list_id, 0)
+
+    def list_of(self, key):
+        """
+        Return the id of the list holding key.
+        """
+        return self.owner[self.slots[key]]
+
+    def first(self, list_id):
+        """
+        Return the oldest key of a non-empty list.
+        """
+        return self.keys[self.heads[list_id]]
+
+    def append(self, key, list_id):
+        """
+        Add a new key at the end of a list.
+        """
+        slot = self.free
+        if slot < 0:
+            slot = len(self.keys)
+            self.keys.append(key)
+            self.prev.append(-1)
+            self.next.append(-1)
+            self.owner.append(list_id)
+        else:
+            self.free = self.next[slot]
+            self.keys[slot] = key
+            self.owner[slot] = list_id
+        self.slots[key] = slot
+        self._link(slot, list_id)
+
+    def move(self, key, list_id):
+        """
+        Move a key to the end of a list, which may be its own list.
+        """
+        slot = self.slots[key]
+        self._unlink(slot, self.owner[slot])
+        self.owner[slot] = list_id
+        self._link(slot, list_id)
+
+    def remove(self, key):
+        """
+        Remove a key and free its slot.
+
+        Returns:
+            int: The id of the list that held key.
+        """
+        slot = self.slots.pop(key)
+        list_id = self.owner[slot]
+        self._unlink(slot, list_id)
+        self.keys[slot] = None
+        self.next[slot] = self.free
+        self.free = slot
+        return list_id
+
+    def _link(self, slot, list_id):
+        """
+        Link a slot at the end of a list.
+        """
+        tail = self.tails.get(list_id, -1)
+        self.prev[slot] = tail
+        self.next[slot] = -1
+        if tail < 0:
+            self.heads[list_id] = slot
+            self.sizes[list_id] = 1
+        else:
+            self.next[tail] = slot
+            self.sizes[list_id] += 1
+        self.tails[list_id] = slot
+
+    def _unlink(self, slot, list_id):
+        """
+        Unlink a slot from its list, forgetting the list once empty.
+        """
+        prev, next_ = self.prev[slot], self.next[slot]
+        if prev < 0 and next_ < 0:
+            del self.heads[list_id]
+            del self.tails[list_id]
+            del self.sizes[list_id]
+            return
+        if prev < 0:
+            self.heads[list_id] = next_
+        else:
+            self.next[prev] = next_
+        if next_ < 0:
+            self.tails[list_id] = prev
+        else:
+            self.prev[next_] = prev
+        self.sizes[list_id] -= 1
@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+tiered_cache.py
+This module provides a TieredCache class that puts any BaseCaching policy
+in front of a persistent sqlite store, so cached items survive restarts.
+"""
+
+import pickle
+import sqlite3
+import threading
+import time
+
+LRUCache = __import__('3-lru_cache').LRUCache
+
+
+class TieredCache():
+    """
+    TieredCache is a two-level cache: L1 is an in-process BaseCaching
+    policy and L2 is a sqlite table on disk.
+
+    A get that misses L1 looks in L2, and an item found there is promoted
+    back into L1. In write-through mode (the default) every put is also
+    written to L2. In write-back mode a put only marks the item dirty in
+    L1; it is written to L2 when L1 discards it, or by flush and close.
+    An item L1 does not keep is written to L2 right away.
+
+    Keys and items are pickled, so keys must pickle to the same bytes
+    whenever they are equal, as str, int and tuples of them do. Expiry
+    deadlines are stored as wall clock times, so a ttl still holds after
+    a restart. purge deletes the expired rows of L2 and, past max_rows,
+    the rows written longest ago; it runs on its own once max_rows / 8
+    rows were written since the last purge.
+    """
+
+    def __init__(self, path, l1=None, write_back=False, max_rows=None):
+        """
+        Initialize the TieredCache and open, or create, its L2 store.
+
+        Args:
+            path (str): The sqlite database file of L2.
+            l1 (BaseCaching): The L1 policy, an LRUCache of 1024 items by
+                default, or a ConcurrentCache. Its on_evict callback is
+                still called.
+            write_back (bool): Delay L2 writes until L1 discards an item.
+            max_rows (int): The most rows L2 keeps after a purge. Default
+                is no limit.
+        """
+        if l1 is None:
+            l1 = LRUCache(max_items=1024, on_evict=None)
+        self.l1 = l1
+        self.write_back = write_back
+        self.dirty = {}
+        self.max_rows = max_rows
+        self.unpurged = 0
+        self.lock = threading.RLock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS cache ("
+                        "key BLOB PRIMARY KEY, item BLOB, deadline REAL)")
+        self.db.execute("CREATE INDEX IF NOT EXISTS cache_deadline "
+                        "ON cache (deadline)")
+        self.l1_on_evict = l1.on_evict
+        l1.on_evict = self._on_l1_evict
+
+    def __enter__(self):
+        """
+        Use the TieredCache as a context manager that closes it.
+        """
+        return self
+
+    def __exit__(self, *exc_info):
+        """
+        Flush and close the TieredCache.
+        """
+        self.close()
+
+    def put(self, key, item, ttl=None):
+        """
+        Add an item in the cache.
+
+        Args:
+            key (str): The key under which the item is stored.
+            item (any): The item to store in the cache.
+            ttl (float): How long the item stays valid, in seconds. The
+                default ttl of L1 applies when None.
+        """
+        if key is None or item is None:
+            return
+        if ttl is None:
+            ttl = self.l1.ttl
+        deadline = None if ttl is None else time.time() + ttl
+        with self.lock:
+            self.l1.put(key, item, ttl)
+            # An item L1 refused, by admission or for its size, is only
+            # kept by L2
+            if self.write_back and self._l1_item(key) is item:
+                self.dirty[key] = deadline
+            else:
+                self.dirty.pop(key, None)
+                self._write([(key, item, deadline)])
+
+    def get(self, key):
+        """
+        Get an item by key from L1, or else from L2. Only a miss in L1
+        takes the lock of the TieredCache, so hits in a ConcurrentCache
+        L1 do not wait for sqlite.
+
+        Args:
+            key (str): The key to look up in the cache.
+
+        Returns:
+            any: The item stored under the key/None if the key doesn't exist.
+        """
+        if key is None:
+            return None
+        item = self.l1.get(key)
+        if item is not None:
+            return item
+        with self.lock:
+            # A put may have stored a newer item meanwhile
+            item = self._l1_item(key)
+            if item is not None:
+                return item
+            row = self.db.execute(
+                "SELECT item, deadline FROM cache WHERE key = ?",
+                (pickle.dumps(key),)).fetchone()
+            if row is None:
+                return None
+            item, deadline = pickle.loads(row[0]), row[1]
+            ttl = None
+            if deadline is not None:
+                ttl = deadline - time.time()
+                if ttl <= 0:
+                    self._delete([key])
+                    return None
+            self.l1.put(key, item, ttl)
+            return item
+
+    def delete_many(self, keys):
+        """
+        Remove many keys from both levels.
+
+        Args:
+            keys (list): The keys to remove.
+        """
+        keys = list(keys)
+        with self.lock:
+            self.l1.delete_many(keys)
+            for key in keys:
+                self.dirty.pop(key, None)
+            self._delete(keys)
+
+    def flush(self):
+        """
+        Write every dirty item still in L1 to L2.
+        """
+        with self.lock:
+            rows = []
+            for key, deadline in self.dirty.items():
+                item = self._l1_item(key)
+                if item is not None:
+                    rows.append((key, item, deadline))
+            self.dirty.clear()
+            self._write(rows)
+
+    def purge(self):
+        """
+        Delete the expired rows of L2, then the rows written longest ago
+        while L2 holds more than max_rows.
+
+        Returns:
+            int: The number of rows deleted.
+        """
+        with self.lock, self.db:
+            self.unpurged = 0
+            deleted = self.db.execute(
+                "DELETE FROM cache WHERE deadline <= ?",
+                (time.time(),)).rowcount
+            if self.max_rows is not None:
+                # INSERT OR REPLACE gives a new rowid, in write order
+                excess = self.db.execute(
+                    "SELECT COUNT(*) FROM cache").fetchone()[0]
+                excess -= self.max_rows
+                if excess > 0:
+                    deleted += self.db.execute(
+                        "DELETE FROM cache WHERE rowid IN (SELECT rowid "
+                        "FROM cache ORDER BY rowid LIMIT ?)",
+                        (excess,)).rowcount
+            return deleted
+
+    def close(self):
+        """
+        Flush the dirty items and close L2.
+        """
+        with self.lock:
+            self.flush()
+            self.db.close()
+
+    def _l1_item(self, key):
+        """
+        Return the item of key in L1, or None, without counting a hit or
+        changing the policy state.
+        """
+        l1 = self.l1.shard(key) if hasattr(self.l1, "shard") else self.l1
+        return l1.cache_data.get(key)
+
+    def _on_l1_evict(self, key, item):
+        """
+        Write a dirty item discarded by L1 to L2.
+        """
+        if key in self.dirty:
+            self._write([(key, item, self.dirty.pop(key))])
+        if self.l1_on_evict is not None:
+            self.l1_on_evict(key, item)
+
+    def _write(self, rows):
+        """
+        Store (key, item, deadline) rows in L2, in one transaction.
+        """
+        if not rows:
+            return
+        with self.db:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO cache VALUES (?, ?, ?)",
+                [(pickle.dumps(key), pickle.dumps(item), deadline)
+                 for key, item, deadline in rows])
+        if self.max_rows is not None:
+            self.unpurged += len(rows)
+            if self.unpurged > self.max_rows // 8:
+                self.purge()
+
+    def _delete(self, keys):
+        """
+        Remove keys from L2, in one transaction.
+        """
+        with self.db:
+            self.db.executemany("DELETE FROM cache WHERE key = ?",
+                                [(pickle.dumps(key),) for key in keys])
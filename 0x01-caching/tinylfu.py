@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+tinylfu.py
+This module provides the TinyLFU admission filter, which any BaseCaching
+policy can use to refuse new keys that are not worth an eviction.
+"""
+
+HALVE = bytes(count >> 1 for count in range(256))
+SEEDS = (0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F,
+         0x165667B19E3779F9, 0xD6E8FEB86659FD93)
+MASK64 = (1 << 64) - 1
+
+
+class TinyLFU():
+    """
+    TinyLFU estimates how often keys were requested with a count-min
+    sketch: `depth` rows of `width` small counters, each key hashed to
+    one counter per row and estimated by the lowest of them. Its memory
+    is fixed, whatever the number of distinct keys seen.
+
+    The sketch ages: after `sample_factor` * size increments every
+    counter is halved, so old popularity fades away.
+
+    A cache created with admission=TinyLFU(size) records every key it is
+    asked for, and when a new key would cause an eviction, only admits
+    it if its estimate is higher than the estimate of the victim.
+    """
+    MAX_COUNT = 15
+
+    def __init__(self, size, depth=4, sample_factor=10):
+        """
+        Initialize an empty sketch.
+
+        Args:
+            size (int): The expected number of items of the cache.
+            depth (int): The number of rows, at most 4.
+            sample_factor (int): The number of increments between two
+                agings, as a multiple of size.
+        """
+        bits = max(4, (size - 1).bit_length())
+        self.width = 1 << bits
+        self.shift = 64 - bits
+        self.seeds = SEEDS[:depth]
+        self.table = bytearray(self.width * len(self.seeds))
+        self.sample_size = max(1, sample_factor * size)
+        self.additions = 0
+
+    def _slots(self, key):
+        """
+        Return the index of the counter of key in every row.
+        """
+        h = hash(key)
+        return [row * self.width + (((h * seed) & MASK64) >> self.shift)
+                for row, seed in enumerate(self.seeds)]
+
+    def record(self, key):
+        """
+        Count one request for key, aging the sketch when it is due.
+
+        Args:
+            key: The requested key.
+        """
+        table = self.table
+        for slot in self._slots(key):
+            if table[slot] < self.MAX_COUNT:
+                table[slot] += 1
+        self.additions += 1
+        if self.additions >= self.sample_size:
+            self.table = table.translate(HALVE)
+            self.additions //= 2
+
+    def estimate(self, key):
+        """
+        Return the estimated number of recent requests for key.
+
+        Args:
+            key: The key to estimate.
+
+        Returns:
+            int: An estimate that can only be too high, never too low,
+                up to MAX_COUNT.
+        """
+        table = self.table
+        return min(table[slot] for slot in self._slots(key))
+
+    def admit(self, candidate, victim):
+        """
+        Tell whether candidate is worth evicting victim for.
+
+        Args:
+            candidate: The new key.
+            victim: The key the cache policy would discard for it.
+
+        Returns:
+            bool: True if candidate is estimated to be more popular.
+        """
+        return self.estimate(candidate) > self.estimate(victim)